@@ -0,0 +1,46 @@
+"""Сериализация моделей в словари для JSON без шаблонов и форм."""
+
+
+def serialize_post(request, post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'image': (
+            request.build_absolute_uri(post.image.url) if post.image
+            else None
+        ),
+        'comments_count': post.comments_count,
+    }
+
+
+def serialize_comment(request, comment):
+    return {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+def serialize_person(request, user):
+    return {
+        'username': user.username,
+        'full_name': user.get_full_name(),
+    }
+
+
+def serialize_page(request, page_obj, serialize):
+    """Страница курсорной пагинации со ссылками на соседние."""
+    def link(param, cursor):
+        if cursor is None:
+            return None
+        return f'{request.path}?{param}={cursor}'
+
+    return {
+        'results': [serialize(request, obj) for obj in page_obj],
+        'next': link('after', page_obj.next_cursor),
+        'previous': link('before', page_obj.previous_cursor),
+    }
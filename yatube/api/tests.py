@@ -0,0 +1,174 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api import urls
+from core.budgets import assert_within_budget
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for number in range(13):
+            cls.post = Post.objects.create(
+                author=cls.author,
+                text=f'Тестовый пост {number}',
+                group=cls.group if number % 2 else None,
+            )
+        for number in range(12):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Комментарий {number}'
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(ApiTest.reader)
+
+    def test_index_cursor_pagination(self):
+        """Лента отдаётся страницами с курсорными ссылками."""
+        response = self.guest_client.get(reverse('api:index'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = response.json()
+        self.assertEqual(len(data['results']), 10)
+        self.assertIsNone(data['previous'])
+        first = data['results'][0]
+        self.assertEqual(first['id'], ApiTest.post.pk)
+        self.assertEqual(first['author'], 'author')
+        self.assertEqual(first['comments_count'], 12)
+        data = self.guest_client.get(data['next']).json()
+        self.assertEqual(len(data['results']), 3)
+        self.assertIsNone(data['next'])
+        self.assertIsNotNone(data['previous'])
+
+    def test_group_and_profile(self):
+        """Лента группы и профиля содержат описание группы и автора."""
+        data = self.guest_client.get(
+            reverse('api:group_list', kwargs={'slug': 'test-slug'})
+        ).json()
+        self.assertEqual(data['group']['title'], 'Тестовая группа')
+        self.assertEqual(len(data['results']), 6)
+        data = self.guest_client.get(
+            reverse('api:profile', kwargs={'username': 'author'})
+        ).json()
+        self.assertEqual(data['author']['posts_count'], 13)
+        self.assertEqual(data['author']['followers_count'], 1)
+
+    def test_follow_lists(self):
+        data = self.guest_client.get(
+            reverse('api:followers', kwargs={'username': 'author'})
+        ).json()
+        self.assertEqual(data, {
+            'results': [{'username': 'reader', 'full_name': ''}],
+            'next': None,
+        })
+        data = self.guest_client.get(
+            reverse('api:following', kwargs={'username': 'reader'})
+        ).json()
+        self.assertEqual(data['results'][0]['username'], 'author')
+        response = self.guest_client.get(
+            reverse('api:followers', kwargs={'username': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_follow_requires_login(self):
+        url = reverse('api:follow_index')
+        self.assertEqual(self.guest_client.get(url).status_code, 401)
+        data = self.reader_client.get(url).json()
+        self.assertEqual(len(data['results']), 10)
+
+    def test_post_detail_and_comments(self):
+        post_id = ApiTest.post.pk
+        data = self.guest_client.get(
+            reverse('api:post_detail', kwargs={'post_id': post_id})
+        ).json()
+        self.assertEqual(data['text'], 'Тестовый пост 12')
+        data = self.guest_client.get(
+            reverse('api:comments', kwargs={'post_id': post_id})
+        ).json()
+        self.assertEqual(data['results'][0]['text'], 'Комментарий 0')
+        data = self.guest_client.get(data['next']).json()
+        self.assertEqual(
+            [comment['text'] for comment in data['results']],
+            ['Комментарий 10', 'Комментарий 11']
+        )
+
+    def test_missing_objects_return_json_404(self):
+        for url in (
+            reverse('api:post_detail', kwargs={'post_id': 0}),
+            reverse('api:comments', kwargs={'post_id': 0}),
+            reverse('api:group_list', kwargs={'slug': 'missing'}),
+            reverse('api:profile', kwargs={'username': 'missing'}),
+        ):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json(), {'detail': 'Не найдено'})
+
+    def test_etag_not_modified(self):
+        """Неизменённая страница отдаёт 304 без запросов к постам."""
+        url = reverse('api:index')
+        etag = self.guest_client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+    def test_etag_changes_after_write(self):
+        """Новый комментарий меняет ETag."""
+        url = reverse('api:comments', kwargs={'post_id': ApiTest.post.pk})
+        etag = self.guest_client.get(url)['ETag']
+        Comment.objects.create(
+            post=ApiTest.post, author=ApiTest.author, text='Новый'
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_follow_etag_depends_on_user(self):
+        url = reverse('api:follow_index')
+        etag = self.reader_client.get(url)['ETag']
+        author_client = Client()
+        author_client.force_login(ApiTest.author)
+        response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_read_only(self):
+        response = self.reader_client.post(reverse('api:index'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_views_within_budget(self):
+        """Каждый маршрут API укладывается в бюджет."""
+        kwargs = {
+            'index': {},
+            'post_detail': {'post_id': ApiTest.post.pk},
+            'comments': {'post_id': ApiTest.post.pk},
+            'group_list': {'slug': 'test-slug'},
+            'profile': {'username': 'author'},
+            'follow_index': {},
+            'followers': {'username': 'author'},
+            'following': {'username': 'reader'},
+        }
+        self.assertEqual(
+            set(kwargs), {pattern.name for pattern in urls.urlpatterns}
+        )
+        for name, params in kwargs.items():
+            path = reverse(f'api:{name}', kwargs=params)
+            for client in (self.guest_client, self.reader_client):
+                client.get(path)
+                with self.subTest(name=name):
+                    assert_within_budget(client, path)
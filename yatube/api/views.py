@@ -0,0 +1,164 @@
+"""JSON-версии лент, поста и комментариев для мобильного клиента.
+
+Ответы собираются из словарей без шаблонов. ETag строится из версии
+страниц core.page_cache, которую меняет любая запись, влияющая на
+публичные страницы, поэтому повторный запрос с If-None-Match получает
+304 без единого запроса к таблицам постов. Ответ, прочитанный с
+реплики вскоре после записи, уходит без ETag (см. core.page_cache).
+"""
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+
+from api.serializers import (serialize_comment, serialize_page,
+                             serialize_person, serialize_post)
+from core.budgets import budget
+from core.page_cache import page_etag, replica_safe_condition
+from core.paginator import CursorPaginator
+from posts.comments import COMMENT_ORDERING
+from posts.counters import get_user_stats
+from posts.feed import get_feed_page
+from posts.follows import get_follow_list
+from posts.models import Comment, Group, Post, User
+from posts.utils import FEED_ORDERING
+
+
+def api_etag(request, *args, **kwargs):
+    """ETag ответа; от читателя зависит только лента подписок."""
+    if request.resolver_match.url_name != 'follow_index':
+        return page_etag(request)
+    if not request.user.is_authenticated:
+        return None
+    return page_etag(request, per_user=True)
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params={
+        'ensure_ascii': False, 'separators': (',', ':'),
+    })
+
+
+def not_found():
+    return json_response({'detail': 'Не найдено'}, status=404)
+
+
+def cursor_page(request, queryset, ordering=FEED_ORDERING):
+    paginator = CursorPaginator(queryset, settings.PER_PAGE, ordering)
+    return paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+
+
+@budget(queries=4, ms=50)
+@require_safe
+@replica_safe_condition(etag_func=api_etag)
+def index(request):
+    page_obj = cursor_page(
+        request, Post.objects.select_related('author', 'group')
+    )
+    return json_response(serialize_page(request, page_obj, serialize_post))
+
+
+@budget(queries=5, ms=50)
+@require_safe
+@replica_safe_condition(etag_func=api_etag)
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).first()
+    if group is None:
+        return not_found()
+    page_obj = cursor_page(request, group.posts.select_related('author'))
+    data = serialize_page(request, page_obj, serialize_post)
+    data['group'] = {
+        'slug': group.slug,
+        'title': group.title,
+        'description': group.description,
+    }
+    return json_response(data)
+
+
+@budget(queries=6, ms=50)
+@require_safe
+@replica_safe_condition(etag_func=api_etag)
+def profile(request, username):
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        return not_found()
+    stats = get_user_stats(author)
+    page_obj = cursor_page(request, author.posts.select_related('group'))
+    data = serialize_page(request, page_obj, serialize_post)
+    data['author'] = {
+        'username': author.username,
+        'full_name': author.get_full_name(),
+        'posts_count': stats.posts_count,
+        'followers_count': stats.followers_count,
+        'following_count': stats.following_count,
+    }
+    return json_response(data)
+
+
+def follow_list_response(request, username, kind):
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        return not_found()
+    people, next_cursor = get_follow_list(
+        kind, author.pk, after=request.GET.get('after')
+    )
+    return json_response({
+        'results': [serialize_person(request, person) for person in people],
+        'next': (
+            f'{request.path}?after={next_cursor}' if next_cursor else None
+        ),
+    })
+
+
+@budget(queries=3, ms=50)
+@require_safe
+@replica_safe_condition(etag_func=api_etag)
+def followers(request, username):
+    return follow_list_response(request, username, 'followers')
+
+
+@budget(queries=3, ms=50)
+@require_safe
+@replica_safe_condition(etag_func=api_etag)
+def following(request, username):
+    return follow_list_response(request, username, 'following')
+
+
+@budget(queries=6, ms=50)
+@require_safe
+@replica_safe_condition(etag_func=api_etag)
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return json_response({'detail': 'Нужна авторизация'}, status=401)
+    page_obj = get_feed_page(request, request.user)
+    return json_response(serialize_page(request, page_obj, serialize_post))
+
+
+@budget(queries=3, ms=50)
+@require_safe
+@replica_safe_condition(etag_func=api_etag)
+def post_detail(request, post_id):
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id
+    ).first()
+    if post is None:
+        return not_found()
+    return json_response(serialize_post(request, post))
+
+
+@budget(queries=4, ms=50)
+@require_safe
+@replica_safe_condition(etag_func=api_etag)
+def comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return not_found()
+    page_obj = cursor_page(
+        request,
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        COMMENT_ORDERING,
+    )
+    return json_response(
+        serialize_page(request, page_obj, serialize_comment)
+    )
@@ -0,0 +1,206 @@
+"""Замеры задержки страниц через WSGI-приложение проекта.
+
+Каждый маршрут из BENCH_URLCONFS открывается анонимно и от имени
+пользователя запросом прямо в yatube.wsgi.application, со всеми
+middleware и закрытием соединения в конце запроса, как на сервере.
+Для каждого случая считаются перцентили времени, число SQL-запросов
+и размер ответа; результаты сравниваются с сохранённым базовым JSON.
+"""
+import math
+import sys
+import time
+from importlib import import_module
+from io import BytesIO
+from urllib.parse import unquote_to_bytes
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY)
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.db.models import Count
+from django.urls import URLPattern, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from posts.models import Group, Post, User
+
+BENCH_URLCONFS = ('posts.urls', 'users.urls', 'about.urls',
+                  'api.urls')
+# GET этих маршрутов меняет данные или завершает сессию.
+SKIPPED_ROUTES = (
+    'posts:profile_follow',
+    'posts:profile_unfollow',
+    'posts:post_delete',
+    'users:logout',
+)
+MODES = ('anonymous', 'user')
+
+
+def get_routes():
+    """Именованные маршруты BENCH_URLCONFS с именами параметров."""
+    routes = []
+    for urlconf in BENCH_URLCONFS:
+        module = import_module(urlconf)
+        for pattern in module.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            name = f'{module.app_name}:{pattern.name}'
+            if name not in SKIPPED_ROUTES:
+                routes.append((name, tuple(pattern.pattern.converters)))
+    return routes
+
+
+def pick_user(username=None):
+    """Пользователь для замеров: заданный или с наибольшим числом подписок."""
+    if username is not None:
+        return User.objects.get(username=username)
+    return User.objects.annotate(
+        following_total=Count('follower')
+    ).order_by('-following_total', 'pk').first()
+
+
+def get_url_kwargs(user):
+    """Значения параметров маршрутов, взятые из базы."""
+    post = (
+        Post.objects.filter(author=user).first()
+        or Post.objects.first()
+    )
+    group = Group.objects.filter(posts__isnull=False).first()
+    return {
+        'post_id': post.pk if post else 1,
+        'username': post.author.username if post else user.username,
+        'slug': group.slug if group else 'none',
+        'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+        'token': default_token_generator.make_token(user),
+    }
+
+
+def login_cookie(user):
+    """Создаёт сессию пользователя и возвращает заголовок Cookie."""
+    engine = import_module(settings.SESSION_ENGINE)
+    session = engine.SessionStore()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+
+def make_environ(url, cookie='', method='GET', body=b'',
+                 content_type=''):
+    path, _, query = url.partition('?')
+    return {
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': unquote_to_bytes(path).decode('iso-8859-1'),
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'HTTP_COOKIE': cookie,
+        'CONTENT_TYPE': content_type,
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def percentile(samples, percent):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def measure(application, url, cookie='', repeat=30, warmup=3):
+    """Открывает url repeat раз и возвращает сводку замеров."""
+    queries = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    timings = []
+    size = 0
+    with connection.execute_wrapper(count_queries):
+        for number in range(warmup + repeat):
+            queries = 0
+            start = time.perf_counter()
+            response = application(make_environ(url, cookie), start_response)
+            try:
+                size = sum(len(chunk) for chunk in response)
+            finally:
+                if hasattr(response, 'close'):
+                    response.close()
+            elapsed = (time.perf_counter() - start) * 1000
+            if number >= warmup:
+                timings.append(elapsed)
+    return {
+        'url': url,
+        'status': statuses[-1],
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'queries': queries,
+        'bytes': size,
+    }
+
+
+def run(application, user, repeat=30, warmup=3, routes=None):
+    """Замеряет все маршруты анонимно и от имени user.
+
+    Возвращает словарь {'<маршрут> [<режим>]': сводка}.
+    """
+    url_kwargs = get_url_kwargs(user)
+    cookies = {'anonymous': '', 'user': login_cookie(user)}
+    results = {}
+    for name, params in get_routes():
+        if routes and not any(route in name for route in routes):
+            continue
+        url = reverse(name, kwargs={
+            param: url_kwargs[param] for param in params
+        })
+        for mode in MODES:
+            results[f'{name} [{mode}]'] = measure(
+                application, url, cookies[mode], repeat, warmup
+            )
+    return results
+
+
+def compare(results, baseline, threshold=0.2, min_delta_ms=0.5):
+    """Находит регрессии относительно базовых результатов.
+
+    Регрессией считается рост p50 больше чем на threshold (и не меньше
+    чем на min_delta_ms, чтобы не ловить шум быстрых страниц) и любой
+    рост числа SQL-запросов.
+    """
+    problems = []
+    for case, current in results.items():
+        old = baseline.get(case)
+        if old is None:
+            continue
+        delta = current['p50_ms'] - old['p50_ms']
+        if delta > old['p50_ms'] * threshold and delta >= min_delta_ms:
+            problems.append(
+                f'{case}: p50 {old["p50_ms"]:.1f} -> '
+                f'{current["p50_ms"]:.1f} мс '
+                f'(+{delta / max(old["p50_ms"], 0.001):.0%})'
+            )
+        if current['queries'] > old['queries']:
+            problems.append(
+                f'{case}: запросов {old["queries"]} -> {current["queries"]}'
+            )
+    return problems
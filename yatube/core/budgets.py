@@ -0,0 +1,62 @@
+"""Бюджеты производительности view-функций.
+
+Бюджет объявляется декоратором @budget рядом с самой view, а тесты
+проверяют его через assert_within_budget: запрос выполняется тестовым
+клиентом, считаются SQL-запросы и время ответа.
+"""
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+Budget = namedtuple('Budget', ('queries', 'ms'))
+
+
+def budget(queries, ms):
+    """Объявляет для view максимум SQL-запросов и миллисекунд."""
+    def decorator(view):
+        view.budget = Budget(queries, ms)
+        return view
+    return decorator
+
+
+def get_budget(path):
+    """Возвращает бюджет view, которая обслуживает path."""
+    return getattr(resolve(path).func, 'budget', None)
+
+
+def assert_within_budget(client, path, method='get', **kwargs):
+    """Выполняет запрос и падает, если view вышла за свой бюджет.
+
+    В сообщении об ошибке перечислены все выполненные SQL-запросы.
+    Время умножается на VIEW_BUDGET_TIME_FACTOR, чтобы медленная
+    машина CI не давала ложных падений.
+    """
+    view_budget = get_budget(path)
+    assert view_budget is not None, f'Для {path} не объявлен @budget'
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        response = getattr(client, method)(path, **kwargs)
+        elapsed = (time.perf_counter() - start) * 1000
+    factor = settings.VIEW_BUDGET_TIME_FACTOR
+    problems = []
+    if len(queries) > view_budget.queries:
+        problems.append(
+            f'запросов {len(queries)} при бюджете {view_budget.queries}'
+        )
+    if elapsed > view_budget.ms * factor:
+        problems.append(
+            f'время {elapsed:.0f} мс при бюджете {view_budget.ms} мс'
+        )
+    if problems:
+        sql = '\n'.join(
+            f'{number}. ({query["time"]} с) {query["sql"]}'
+            for number, query in enumerate(queries.captured_queries, 1)
+        )
+        raise AssertionError(
+            f'{method.upper()} {path}: {", ".join(problems)}\n{sql}'
+        )
+    return response
@@ -0,0 +1,15 @@
+from django.utils.functional import SimpleLazyObject
+
+from posts.follows import get_following_ids
+
+
+def following(request):
+    """Добавляет id авторов, на которых подписан пользователь.
+
+    Подписки читаются из кэша и только если шаблон к ним обратился.
+    """
+    return {
+        'following_ids': SimpleLazyObject(
+            lambda: get_following_ids(request.user)
+        )
+    }
@@ -0,0 +1,303 @@
+"""Нагрузка смешанным потоком чтений и записей через WSGI-приложение.
+
+Потоки или процессы выполняют запросы к yatube.wsgi.application,
+выбирая действие по весам из смеси (mix): чтения лент и постов вперемешку
+с комментариями, новыми постами, подписками и входом на сайт. Так
+проявляются блокировки SQLite, которых не видно в bench_views: запись
+ждёт читателей, а параллельные подписки в profile_follow вставляют одну
+и ту же строку Follow, и лишние отсекает уникальное ограничение.
+
+Каждый запрос записывается сэмплом (время старта, действие, задержка,
+код ответа, ошибка); summarize() сводит их в пропускную способность,
+доли ошибок по видам и гистограммы задержки по интервалам времени.
+"""
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from multiprocessing import Pool
+
+from django.core.signals import got_request_exception
+from django.db import connections
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+from django.utils.http import urlencode
+
+from core.benchmark import login_cookie, make_environ, percentile
+from posts.bench import BENCH_PASSWORD
+from posts.models import Group, Post, User
+
+DEFAULT_MIX = {
+    'index': 40,
+    'post_detail': 20,
+    'profile': 12,
+    'group_list': 6,
+    'follow_index': 6,
+    'add_comment': 7,
+    'post_create': 3,
+    'profile_follow': 3,
+    'login': 3,
+}
+WRITE_ACTIONS = ('add_comment', 'post_create', 'profile_follow', 'login')
+# Верхние границы корзин гистограммы задержки, мс.
+LATENCY_BINS = (10, 50, 100, 500, 1000)
+SAMPLE_POSTS = 1000
+
+_errors = threading.local()
+
+
+def _remember_error(sender, request=None, **kwargs):
+    error = sys.exc_info()[1]
+    if error is not None:
+        _errors.last = f'{type(error).__name__}: {error}'
+
+
+got_request_exception.connect(
+    _remember_error, weak=False, dispatch_uid='core.loadgen'
+)
+
+
+def parse_mix(text):
+    """Разбирает смесь вида 'index=40,add_comment=5'."""
+    mix = {}
+    for item in text.split(','):
+        action, _, weight = item.partition('=')
+        action = action.strip()
+        if action not in DEFAULT_MIX:
+            raise ValueError(f'Неизвестное действие {action}')
+        mix[action] = float(weight)
+    return mix
+
+
+class Workload:
+    """Данные для запросов: сессии пользователей, посты, авторы, группы."""
+
+    def __init__(self, users=20, anonymous=0.3):
+        self.anonymous = anonymous
+        self.users = [
+            (user.username, login_cookie(user))
+            for user in User.objects.order_by('pk')[:users]
+        ]
+        self.post_ids = list(
+            Post.objects.values_list('pk', flat=True)[:SAMPLE_POSTS]
+        )
+        self.authors = list(
+            Post.objects.order_by().values_list(
+                'author__username', flat=True
+            ).distinct()[:SAMPLE_POSTS]
+        )
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+        if not self.users or not self.post_ids:
+            raise ValueError('Нет пользователей или постов для нагрузки')
+
+    def request(self, action, rng):
+        """Возвращает WSGI environ для действия."""
+        username, cookie = rng.choice(self.users)
+        # Анонимы только читают; писать и входить может лишь пользователь.
+        if action not in WRITE_ACTIONS and action != 'follow_index' \
+                and rng.random() < self.anonymous:
+            cookie = ''
+        return getattr(self, action)(rng, username, cookie)
+
+    def index(self, rng, username, cookie):
+        return make_environ(reverse('posts:index'), cookie)
+
+    def post_detail(self, rng, username, cookie):
+        return make_environ(reverse(
+            'posts:post_detail', kwargs={'post_id': rng.choice(self.post_ids)}
+        ), cookie)
+
+    def profile(self, rng, username, cookie):
+        return make_environ(reverse(
+            'posts:profile', kwargs={'username': rng.choice(self.authors)}
+        ), cookie)
+
+    def group_list(self, rng, username, cookie):
+        if not self.slugs:
+            return self.index(rng, username, cookie)
+        return make_environ(reverse(
+            'posts:group_list', kwargs={'slug': rng.choice(self.slugs)}
+        ), cookie)
+
+    def follow_index(self, rng, username, cookie):
+        return make_environ(reverse('posts:follow_index'), cookie)
+
+    def profile_follow(self, rng, username, cookie):
+        return make_environ(reverse(
+            'posts:profile_follow',
+            kwargs={'username': rng.choice(self.authors)}
+        ), cookie)
+
+    def add_comment(self, rng, username, cookie):
+        return self.post(reverse(
+            'posts:add_comment', kwargs={'post_id': rng.choice(self.post_ids)}
+        ), {'text': 'Комментарий под нагрузкой'}, cookie)
+
+    def post_create(self, rng, username, cookie):
+        return self.post(
+            reverse('posts:post_create'), {'text': 'Пост под нагрузкой'},
+            cookie
+        )
+
+    def login(self, rng, username, cookie):
+        return self.post(
+            reverse('users:login'),
+            {'username': username, 'password': BENCH_PASSWORD}, ''
+        )
+
+    def post(self, url, data, cookie):
+        # Один и тот же токен в cookie и в форме проходит проверку CSRF.
+        token = get_random_string(64)
+        cookie = f'{cookie}; csrftoken={token}'.lstrip('; ')
+        body = urlencode(dict(data, csrfmiddlewaretoken=token)).encode()
+        return make_environ(
+            url, cookie, 'POST', body, 'application/x-www-form-urlencoded'
+        )
+
+
+def call(application, environ):
+    """Выполняет запрос; возвращает код ответа и текст ошибки."""
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    _errors.last = ''
+    response = application(environ, start_response)
+    try:
+        for _ in response:
+            pass
+    finally:
+        # close() у ответа WSGI необязателен.
+        if hasattr(response, 'close'):
+            response.close()
+    status = statuses[-1]
+    error = ''
+    if status >= 500:
+        error = _errors.last or f'HTTP {status}'
+    return status, error
+
+
+def run_worker(application, workload, mix, duration, seed, started):
+    """Шлёт запросы до истечения duration секунд с момента started."""
+    rng = random.Random(seed)
+    actions = list(mix)
+    weights = [mix[action] for action in actions]
+    samples = []
+    try:
+        while True:
+            now = time.perf_counter()
+            if now - started >= duration:
+                break
+            action = rng.choices(actions, weights)[0]
+            environ = workload.request(action, rng)
+            status, error = call(application, environ)
+            latency = (time.perf_counter() - now) * 1000
+            samples.append((now - started, action, latency, status, error))
+    finally:
+        connections.close_all()
+    return samples
+
+
+def _run_threads(application, workload, mix, duration, threads, seed):
+    started = time.perf_counter()
+    if threads == 1:
+        return run_worker(application, workload, mix, duration, seed,
+                          started)
+    results = [None] * threads
+
+    def target(number):
+        results[number] = run_worker(
+            application, workload, mix, duration, seed + number, started
+        )
+
+    workers = [
+        threading.Thread(target=target, args=(number,))
+        for number in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return [sample for result in results for sample in result]
+
+
+def _run_process(args):
+    # Обработчик WSGI не сериализуется, процесс берёт свой.
+    from yatube.wsgi import application
+    return _run_threads(application, *args)
+
+
+def run_load(application, workload, mix, duration, threads=1, processes=1,
+             seed=42):
+    """Запускает нагрузку и возвращает сэмплы всех воркеров."""
+    if processes == 1:
+        return _run_threads(application, workload, mix, duration, threads,
+                            seed)
+    # Дочерние процессы не должны делить соединение с родителем.
+    connections.close_all()
+    with Pool(processes) as pool:
+        results = pool.map(_run_process, [
+            (workload, mix, duration, threads, seed + number * threads)
+            for number in range(processes)
+        ])
+    return [sample for result in results for sample in result]
+
+
+def _latency_summary(latencies):
+    return {
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+    }
+
+
+def _histogram(latencies):
+    counts = Counter()
+    for latency in latencies:
+        for bound in LATENCY_BINS:
+            if latency < bound:
+                counts[f'<{bound}'] += 1
+                break
+        else:
+            counts[f'>={LATENCY_BINS[-1]}'] += 1
+    return dict(counts)
+
+
+def summarize(samples, duration, interval=1.0):
+    """Сводит сэмплы в общий отчёт, отчёт по действиям и по времени."""
+    report = {
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / duration, 1),
+        'errors': dict(Counter(error for *_, error in samples if error)),
+        'actions': {},
+        'timeline': [],
+    }
+    by_action = defaultdict(list)
+    by_interval = defaultdict(list)
+    for sample in samples:
+        by_action[sample[1]].append(sample)
+        by_interval[int(sample[0] // interval)].append(sample)
+    for action, action_samples in sorted(by_action.items()):
+        errors = sum(1 for *_, error in action_samples if error)
+        report['actions'][action] = dict(
+            requests=len(action_samples),
+            error_rate=round(errors / len(action_samples), 4),
+            statuses={
+                str(status): count for status, count in sorted(Counter(
+                    sample[3] for sample in action_samples
+                ).items())
+            },
+            **_latency_summary([sample[2] for sample in action_samples]),
+        )
+    for number, interval_samples in sorted(by_interval.items()):
+        latencies = [sample[2] for sample in interval_samples]
+        report['timeline'].append(dict(
+            start_s=round(number * interval, 3),
+            requests=len(interval_samples),
+            errors=sum(1 for *_, error in interval_samples if error),
+            histogram=_histogram(latencies),
+            **_latency_summary(latencies),
+        ))
+    return report
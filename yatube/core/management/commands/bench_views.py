@@ -0,0 +1,97 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import compare, pick_user, run
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку всех страниц posts, users и about через '
+        'WSGI-приложение и сравнивает с базовыми результатами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=30,
+            help='Сколько замеров на случай.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help='Сколько запросов сделать до замеров.'
+        )
+        parser.add_argument(
+            '--username', default=None,
+            help='Пользователь для случаев с входом; по умолчанию '
+                 'пользователь с наибольшим числом подписок.'
+        )
+        parser.add_argument(
+            '--route', action='append', dest='routes',
+            help='Замерять только маршруты, содержащие подстроку; '
+                 'можно указать несколько раз.'
+        )
+        parser.add_argument(
+            '--output', help='Куда записать результаты в JSON.'
+        )
+        parser.add_argument(
+            '--baseline', help='JSON прошлого запуска для сравнения.'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимый рост p50 относительно базы, доля.'
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=0.5,
+            help='Рост p50 меньше этого не считается регрессией.'
+        )
+
+    def handle(self, *args, **options):
+        from yatube.wsgi import application
+
+        try:
+            user = pick_user(options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {options["username"]} '
+                               f'не найден')
+        if user is None:
+            raise CommandError('В базе нет пользователей, '
+                               'сначала запустите seed_bench')
+        if settings.DEBUG:
+            self.stderr.write(
+                'DEBUG=True: в замеры входит запись SQL в connection.queries'
+            )
+        results = run(
+            application, user, options['repeat'], options['warmup'],
+            options['routes'],
+        )
+        self.stdout.write(
+            f'{"случай":<48} {"код":>4} {"p50":>8} {"p95":>8} {"p99":>8} '
+            f'{"SQL":>4} {"байт":>8}'
+        )
+        for case, result in results.items():
+            self.stdout.write(
+                f'{case:<48} {result["status"]:>4} '
+                f'{result["p50_ms"]:>8.1f} {result["p95_ms"]:>8.1f} '
+                f'{result["p99_ms"]:>8.1f} {result["queries"]:>4} '
+                f'{result["bytes"]:>8}'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(
+                    {'username': user.username, 'results': results},
+                    file, ensure_ascii=False, indent=2,
+                )
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)['results']
+            problems = compare(
+                results, baseline, options['threshold'],
+                options['min_delta_ms'],
+            )
+            if problems:
+                raise CommandError(
+                    'Регрессии относительно базы:\n' + '\n'.join(problems)
+                )
+            self.stdout.write('Регрессий относительно базы нет')
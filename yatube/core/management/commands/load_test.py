@@ -0,0 +1,111 @@
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadgen import (DEFAULT_MIX, LATENCY_BINS, Workload, parse_mix,
+                          run_load, summarize)
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает WSGI-приложение смесью чтений и записей из нескольких '
+        'потоков или процессов и печатает задержки и ошибки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--duration', type=float, default=30,
+            help='Длительность нагрузки, секунды.'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Потоков в каждом процессе.'
+        )
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Число процессов.'
+        )
+        parser.add_argument(
+            '--mix', default=None,
+            help='Веса действий, например index=40,add_comment=5. '
+                 f'Действия: {", ".join(DEFAULT_MIX)}.'
+        )
+        parser.add_argument(
+            '--users', type=int, default=20,
+            help='Сколько пользователей держат сессии.'
+        )
+        parser.add_argument(
+            '--anonymous', type=float, default=0.3,
+            help='Доля анонимных чтений.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1,
+            help='Шаг гистограмм по времени, секунды.'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--output', help='Куда записать отчёт в JSON.'
+        )
+
+    def handle(self, *args, **options):
+        from yatube.wsgi import application
+
+        try:
+            mix = parse_mix(options['mix']) if options['mix'] \
+                else DEFAULT_MIX
+            workload = Workload(options['users'], options['anonymous'])
+        except ValueError as error:
+            raise CommandError(error)
+        # Ошибки попадают в отчёт, трассировки в консоли только мешают.
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            samples = run_load(
+                application, workload, mix, options['duration'],
+                options['threads'], options['processes'], options['seed'],
+            )
+        finally:
+            request_logger.setLevel(level)
+        report = summarize(samples, options['duration'], options['interval'])
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+    def print_report(self, report):
+        self.stdout.write(
+            f'Запросов: {report["requests"]}, '
+            f'{report["throughput_rps"]} в секунду'
+        )
+        self.stdout.write(
+            f'{"действие":<16} {"запросов":>8} {"ошибок":>7} '
+            f'{"p50":>8} {"p95":>8} {"p99":>8}  коды ответов'
+        )
+        for action, result in report['actions'].items():
+            self.stdout.write(
+                f'{action:<16} {result["requests"]:>8} '
+                f'{result["error_rate"]:>7.1%} {result["p50_ms"]:>8.1f} '
+                f'{result["p95_ms"]:>8.1f} {result["p99_ms"]:>8.1f}  '
+                + ' '.join(
+                    f'{status}:{count}'
+                    for status, count in result['statuses'].items()
+                )
+            )
+        for error, count in report['errors'].items():
+            self.stdout.write(self.style.WARNING(f'{count:>6} × {error}'))
+        bins = [f'<{bound}' for bound in LATENCY_BINS]
+        bins.append(f'>={LATENCY_BINS[-1]}')
+        self.stdout.write(
+            f'{"с":>6} {"запросов":>8} {"ошибок":>6} {"p95":>8}  '
+            + ' '.join(f'{name:>6}' for name in bins)
+        )
+        for row in report['timeline']:
+            self.stdout.write(
+                f'{row["start_s"]:>6.0f} {row["requests"]:>8} '
+                f'{row["errors"]:>6} {row["p95_ms"]:>8.1f}  '
+                + ' '.join(
+                    f'{row["histogram"].get(name, 0):>6}' for name in bins
+                )
+            )
@@ -0,0 +1,345 @@
+"""Метрики приложения в текстовом формате Prometheus.
+
+Каждый процесс (воркер WSGI, runworker) копит счётчики и гистограммы
+в памяти и не реже раза в METRICS_FLUSH_INTERVAL секунд сбрасывает их
+целиком в свой файл METRICS_DIR/<pid>-<метка>.json. Страница /metrics
+складывает файлы всех процессов, поэтому на одной машине метрики
+сходятся без внешнего сервиса.
+
+Вклад завершившегося процесса нельзя просто выбросить: сумма счётчиков
+уменьшится, и Prometheus примет это за сброс. Поэтому процесс при
+выходе, а /metrics за убитыми процессами (их pid больше не существует)
+переносят значения в общий archive.json под файловой блокировкой и
+удаляют файл процесса. Так число файлов не растёт с перезапусками, а
+суммы остаются монотонными.
+
+Метрики запросов пишет MetricsMiddleware по данным core.timing.
+"""
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from glob import glob
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core import timing
+
+ARCHIVE = 'archive.json'
+LOCK = '.lock'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55)
+THUMBNAIL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Имя: (тип, описание, границы корзин гистограммы).
+METRICS = {
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время ответа по имени маршрута.', LATENCY_BUCKETS,
+    ),
+    'yatube_responses_total': (
+        'counter', 'Ответы по имени маршрута и коду.', None,
+    ),
+    'yatube_db_queries': (
+        'histogram', 'SQL-запросов за запрос по имени маршрута.',
+        QUERY_BUCKETS,
+    ),
+    'yatube_db_query_seconds_total': (
+        'counter', 'Время SQL-запросов по имени маршрута.', None,
+    ),
+    'yatube_cache_requests_total': (
+        'counter', 'Чтения кэша: попадания и промахи.', None,
+    ),
+    'yatube_thumbnail_duration_seconds': (
+        'histogram', 'Время построения превью картинки.', THUMBNAIL_BUCKETS,
+    ),
+}
+
+
+def _dump(counters, histograms):
+    """Значения в виде, который пишется в файл метрик."""
+    return {
+        'counters': [
+            [name, dict(labels), value]
+            for (name, labels), value in counters.items()
+        ],
+        'histograms': [
+            [name, dict(labels), histogram]
+            for (name, labels), histogram in histograms.items()
+        ],
+    }
+
+
+class Registry:
+    """Метрики одного процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        # Метка отличает файл от файла прежнего процесса с тем же pid.
+        self.name = f'{self.pid}-{uuid4().hex[:8]}.json'
+        self.counters = {}
+        self.histograms = {}
+        self.flushed = time.monotonic()
+
+    def _check_fork(self):
+        # Дочерний процесс наследует чужие значения: начинаем с нуля.
+        if os.getpid() != self.pid:
+            self.reset()
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self._check_fork()
+            self.counters[key] = self.counters.get(key, 0) + value
+        self.maybe_flush()
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self._check_fork()
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'buckets': [0] * (len(buckets) + 1), 'sum': 0, 'count': 0,
+                }
+            index = next(
+                (number for number, bound in enumerate(buckets)
+                 if value <= bound),
+                len(buckets),
+            )
+            histogram['buckets'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        if time.monotonic() - self.flushed >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            self._check_fork()
+            return _dump(self.counters, self.histograms)
+
+    def flush(self):
+        """Атомарно переписывает файл процесса текущими значениями."""
+        data = self.snapshot()
+        self.flushed = time.monotonic()
+        if not data['counters'] and not data['histograms']:
+            return
+        directory = settings.METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.name)
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(data, file)
+        os.replace(temporary, path)
+
+    def close(self):
+        """Сбрасывает метрики и переносит файл процесса в архив."""
+        self.flush()
+        with self.lock:
+            # Перенесённое не должно попасть в сумму второй раз.
+            self.counters = {}
+            self.histograms = {}
+        archive([self.name])
+
+
+registry = Registry()
+atexit.register(lambda: settings.METRICS and registry.close())
+
+
+def inc(name, value=1, **labels):
+    if settings.METRICS:
+        registry.inc(name, labels, value)
+
+
+def observe(name, value, **labels):
+    if settings.METRICS:
+        registry.observe(name, labels, value)
+
+
+def _add(counters, histograms, data):
+    """Прибавляет к суммам значения из файла метрик."""
+    for name, labels, value in data['counters']:
+        key = (name, tuple(sorted(labels.items())))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, histogram in data['histograms']:
+        key = (name, tuple(sorted(labels.items())))
+        total = histograms.setdefault(key, {
+            'buckets': [0] * len(histogram['buckets']),
+            'sum': 0,
+            'count': 0,
+        })
+        for index, count in enumerate(histogram['buckets']):
+            total['buckets'][index] += count
+        total['sum'] += histogram['sum']
+        total['count'] += histogram['count']
+
+
+def _read(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _process_alive(name):
+    """Жив ли процесс, записавший файл <pid>-<метка>.json."""
+    try:
+        os.kill(int(name.split('-', 1)[0]), 0)
+    except ProcessLookupError:
+        return False
+    except (ValueError, PermissionError):
+        pass
+    return True
+
+
+@contextmanager
+def _locked(operation):
+    """Блокировка каталога метрик: перенос в архив - эксклюзивно."""
+    directory = settings.METRICS_DIR
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK), 'w') as lock:
+        fcntl.flock(lock, operation)
+        yield directory
+
+
+def archive(names):
+    """Переносит файлы процессов names в archive.json и удаляет их."""
+    with _locked(fcntl.LOCK_EX) as directory:
+        paths = [
+            os.path.join(directory, name) for name in names
+            if os.path.exists(os.path.join(directory, name))
+        ]
+        if not paths:
+            return
+        path = os.path.join(directory, ARCHIVE)
+        counters, histograms = {}, {}
+        for source in (path, *paths):
+            data = _read(source)
+            if data is not None:
+                _add(counters, histograms, data)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(_dump(counters, histograms), file)
+        os.replace(temporary, path)
+        for process_path in paths:
+            os.remove(process_path)
+
+
+def collect():
+    """Складывает файлы всех процессов: (счётчики, гистограммы)."""
+    pattern = os.path.join(settings.METRICS_DIR, '*.json')
+    dead = [
+        name for name in map(os.path.basename, glob(pattern))
+        if name != ARCHIVE and not _process_alive(name)
+    ]
+    if dead:
+        archive(dead)
+    counters = {}
+    histograms = {}
+    # Под общей блокировкой файл не исчезнет между чтением архива и его
+    # собственным чтением: сумма не провалится во время переноса.
+    with _locked(fcntl.LOCK_SH):
+        for path in glob(pattern):
+            data = _read(path)
+            if data is not None:
+                _add(counters, histograms, data)
+    return counters, histograms
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    text = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in pairs
+    )
+    return f'{{{text}}}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _render_histogram(name, buckets, histogram, labels):
+    cumulative = 0
+    bounds = [str(bound) for bound in buckets] + ['+Inf']
+    for bound, count in zip(bounds, histogram['buckets']):
+        cumulative += count
+        yield f'{name}_bucket{_labels(labels, le=bound)} {cumulative}'
+    yield f'{name}_sum{_labels(labels)} {_number(histogram["sum"])}'
+    yield f'{name}_count{_labels(labels)} {histogram["count"]}'
+
+
+def _cache_hit_ratio(counters):
+    totals = {'hit': 0, 'miss': 0}
+    for (name, labels), value in counters.items():
+        if name == 'yatube_cache_requests_total':
+            totals[dict(labels)['result']] += value
+    requests = totals['hit'] + totals['miss']
+    return totals['hit'] / requests if requests else 0.0
+
+
+def render(counters, histograms):
+    """Текстовый формат Prometheus (exposition format 0.0.4)."""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            lines.extend(
+                f'{name}{_labels(labels)} {_number(value)}'
+                for (metric, labels), value in sorted(counters.items())
+                if metric == name
+            )
+            continue
+        for (metric, labels), histogram in sorted(histograms.items()):
+            if metric == name:
+                lines.extend(
+                    _render_histogram(name, buckets, histogram, labels)
+                )
+    lines.append('# HELP yatube_cache_hit_ratio Доля попаданий в кэш.')
+    lines.append('# TYPE yatube_cache_hit_ratio gauge')
+    lines.append(f'yatube_cache_hit_ratio {_cache_hit_ratio(counters)!r}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """Записывает время, код ответа, SQL и кэш каждого запроса."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS:
+            raise MiddlewareNotUsed
+        timing.install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with timing.track() as counts:
+            response = self.get_response(request)
+        # Неизвестные адреса не плодят метки: все 404 идут одной строкой.
+        view = timing.view_name(request) or 'unresolved'
+        observe('yatube_request_duration_seconds',
+                time.perf_counter() - start, view=view)
+        inc('yatube_responses_total', view=view,
+            status=response.status_code)
+        observe('yatube_db_queries', counts.sql_count, view=view)
+        inc('yatube_db_query_seconds_total', counts.sql_ms / 1000, view=view)
+        inc('yatube_cache_requests_total', counts.cache_hits, result='hit')
+        inc('yatube_cache_requests_total', counts.cache_misses,
+            result='miss')
+        return response
@@ -0,0 +1,159 @@
+"""Кэш целых страниц для анонимных посетителей и условные GET.
+
+Ключ страницы содержит версию PAGES_VERSION: любая запись, которая
+может изменить публичные страницы, меняет её через bump_pages(), и
+новый пост виден сразу, а не по истечении таймаута. Та же версия
+служит ETag страниц, поэтому повторный запрос с If-None-Match получает
+304, пока ничего не записано. Рядом с версией bump_pages() хранит время
+записи: это Last-Modified страниц.
+
+То, что кладётся в кэш, читается из основной базы
+(core.replicas.read_primary): иначе отстающая реплика оставила бы
+старую страницу под новой версией. Остальные ответы читаются с реплик,
+и если последняя запись свежее REPLICA_PIN_SECONDS, такой ответ уходит
+без ETag и Last-Modified: реплика могла её ещё не получить.
+"""
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from core import versions
+from core.replicas import read_primary, used_replica
+
+PAGES_VERSION = 'pages'
+PAGES_MODIFIED = 'pages-modified'
+
+
+def _user_version(user_id):
+    return f'pages:user:{user_id}'
+
+
+def bump_user_pages(*user_ids):
+    """Меняет ETag страниц, которые видят пользователи user_ids.
+
+    Для блоков, которые зависят только от читателя и меняются без
+    записи в общие страницы (рекомендации пересчитывает команда).
+    """
+    versions.bump(*[_user_version(user_id) for user_id in user_ids])
+
+
+def bump_pages():
+    """Делает недействительными все закэшированные страницы."""
+    versions.bump(PAGES_VERSION)
+    cache.set(PAGES_MODIFIED, timezone.now(), None)
+
+
+def pages_last_modified():
+    """Время последней записи, которая могла изменить страницы.
+
+    Вытесненную из кэша метку заменяет текущее время: оно не раньше ни
+    одной записи, поэтому 304 на изменённую страницу не уйдёт.
+    """
+    cache.add(PAGES_MODIFIED, timezone.now(), None)
+    return cache.get(PAGES_MODIFIED) or timezone.now()
+
+
+def _page_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page:{versions.get(PAGES_VERSION)}:{path}'
+
+
+def cache_anonymous_page(view):
+    """Кэширует ответы view на GET-запросы анонимных посетителей."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        key = _page_key(request)
+        response = cache.get(key)
+        if response is None:
+            with read_primary():
+                response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+        return response
+    return wrapper
+
+
+def page_etag(request, per_user=False):
+    """Слабый ETag страницы: версия страниц, адрес и, если per_user, читатель.
+
+    Слабый, потому что совпадает смысл ответа, а не его байты. Для
+    вошедшего читателя в ETag входят его версия из bump_user_pages() и
+    секрет CSRF: формы страницы несут токен, а вход меняет секрет, и
+    без этого 304 вернул бы форму со старым токеном.
+    """
+    names = [PAGES_VERSION]
+    user_id = request.user.pk if per_user else None
+    if user_id is not None:
+        names.append(_user_version(user_id))
+    stamps = versions.get_many(names)
+    parts = [stamps[PAGES_VERSION], request.get_full_path()]
+    if per_user:
+        parts.append(str(user_id))
+    if user_id is not None:
+        parts.append(stamps[_user_version(user_id)])
+        # Несолёный секрет: get_token() каждый раз солит его заново.
+        parts.append(request.META.get('CSRF_COOKIE', ''))
+    digest = hashlib.md5(':'.join(parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _etag(request, *args, **kwargs):
+    return page_etag(request, per_user=True)
+
+
+def _last_modified(request, *args, **kwargs):
+    if request.user.is_authenticated:
+        return None
+    return pages_last_modified()
+
+
+def _replica_may_lag():
+    lag = timedelta(seconds=settings.REPLICA_PIN_SECONDS)
+    return timezone.now() - pages_last_modified() < lag
+
+
+def replica_safe_condition(etag_func=None, last_modified_func=None):
+    """condition(), не отдающий валидатор данных отстающей реплики.
+
+    Валидатор строится из версии до чтения данных. Ответ, прочитанный
+    с реплики вскоре после записи, мог не увидеть её, а клиент с таким
+    ETag получал бы 304 со старой страницей до следующей записи.
+    """
+    def decorator(view):
+        conditional_view = condition(
+            etag_func=etag_func, last_modified_func=last_modified_func
+        )(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if (
+                response.status_code == 200
+                and used_replica()
+                and _replica_may_lag()
+            ):
+                del response['ETag']
+                del response['Last-Modified']
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_page(view):
+    """Отвечает 304 на условный GET страницы, не вызывая view.
+
+    ETag зависит от читателя: шапка, формы и кнопки подписки у каждого
+    свои. Last-Modified отдаётся только анонимам: их страница одна на
+    всех. Это время последней записи по всему сайту, а не по моделям
+    страницы: удаления, счётчики, превью и переименования авторов не
+    оставляют времени изменения в строках, но все проходят через
+    bump_pages().
+    """
+    return replica_safe_condition(_etag, _last_modified)(view)
@@ -0,0 +1,160 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import Q
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключу сортировки (keyset).
+
+    Страница выбирается условием WHERE по значениям ключа последнего
+    (или первого) объекта предыдущей страницы, поэтому не нужны ни
+    COUNT(*), ни OFFSET. Поля ключа не должны принимать значение NULL,
+    а последнее поле должно быть уникальным (обычно pk).
+    """
+
+    def __init__(self, object_list, per_page, ordering):
+        super().__init__(object_list.order_by(*ordering), per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [
+            self._get_field(name.lstrip('-')) for name in self.ordering
+        ]
+
+    def _get_field(self, name):
+        opts = self.object_list.model._meta
+        if name == 'pk':
+            return opts.pk
+        return opts.get_field(name)
+
+    def get_key(self, obj):
+        return tuple(field.value_from_object(obj) for field in self.fields)
+
+    def encode_cursor(self, obj):
+        values = [field.value_to_string(obj) for field in self.fields]
+        return urlsafe_base64_encode(json.dumps(values).encode())
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(urlsafe_base64_decode(cursor))
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise InvalidCursor('Некорректный курсор')
+
+    def _keyset_filter(self, cursor, backwards=False):
+        values = self.decode_cursor(cursor)
+        keyset = Q()
+        equal = Q()
+        for name, field, value in zip(self.ordering, self.fields, values):
+            descending = name.startswith('-')
+            lookup = 'lt' if descending != backwards else 'gt'
+            keyset |= equal & Q(**{f'{field.attname}__{lookup}': value})
+            equal &= Q(**{field.attname: value})
+        return keyset
+
+    def page(self, after=None, before=None):
+        """Возвращает страницу после курсора after или перед before.
+
+        Пагинатор знает только соседние страницы, поэтому number и
+        num_pages условные: number == 2 значит, что есть записи новее,
+        num_pages > number - что есть записи старее. Курсоры соседних
+        страниц лежат в page.previous_cursor и page.next_cursor.
+        """
+        queryset = self.object_list
+        if after:
+            queryset = queryset.filter(self._keyset_filter(after))
+        elif before:
+            queryset = queryset.filter(
+                self._keyset_filter(before, backwards=True)
+            ).reverse()
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if before and not after:
+            object_list.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = bool(after), has_more
+        return self._build_page(object_list, has_previous, has_next)
+
+    def _build_page(self, object_list, has_previous, has_next):
+        has_previous = has_previous and bool(object_list)
+        has_next = has_next and bool(object_list)
+        number = 2 if has_previous else 1
+        self.num_pages = number + 1 if has_next else number
+        page = self._get_page(object_list, number, self)
+        page.is_cursor = True
+        page.previous_cursor = (
+            self.encode_cursor(object_list[0]) if has_previous else None
+        )
+        page.next_cursor = (
+            self.encode_cursor(object_list[-1]) if has_next else None
+        )
+        return page
+
+    def get_page(self, after=None, before=None):
+        """Как page(), но с некорректным курсором отдаёт первую страницу."""
+        try:
+            return self.page(after=after, before=before)
+        except InvalidCursor:
+            return self.page()
+
+
+class MergedCursorPaginator(CursorPaginator):
+    """Курсорная пагинация по нескольким источникам с общим ключом.
+
+    Каждый источник - CursorPaginator с одинаковыми по смыслу и
+    направлению полями сортировки; на странице объекты всех источников
+    сливаются в один отсортированный список.
+    """
+
+    def __init__(self, paginators, per_page):
+        Paginator.__init__(self, [], per_page)
+        self.paginators = paginators
+        self.descending = paginators[0].ordering[0].startswith('-')
+
+    def _get_source(self, obj):
+        for paginator in self.paginators:
+            if isinstance(obj, paginator.object_list.model):
+                return paginator
+
+    def get_key(self, obj):
+        return self._get_source(obj).get_key(obj)
+
+    def encode_cursor(self, obj):
+        return self._get_source(obj).encode_cursor(obj)
+
+    def page(self, after=None, before=None):
+        pages = [
+            paginator.page(after=after, before=before)
+            for paginator in self.paginators
+        ]
+        object_list = sorted(
+            (obj for page in pages for obj in page.object_list),
+            key=self.get_key,
+            reverse=self.descending,
+        )
+        has_more = len(object_list) > self.per_page
+        if before and not after:
+            object_list = object_list[-self.per_page:]
+            has_previous = has_more or any(
+                page.has_previous() for page in pages
+            )
+            has_next = True
+        else:
+            object_list = object_list[:self.per_page]
+            has_previous = bool(after)
+            has_next = has_more or any(
+                page.has_next() for page in pages
+            )
+        return self._build_page(object_list, has_previous, has_next)
@@ -0,0 +1,50 @@
+"""Планы SQL-запросов view-функций.
+
+capture_view_queries() вызывает view на GET-запрос в обход middleware
+и собирает её SQL; explain() возвращает EXPLAIN QUERY PLAN запроса, а
+plan_problems() находит в плане полные просмотры таблиц и временные
+B-деревья для сортировки. Работает только на SQLite.
+"""
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+TEMP_B_TREE = 'USE TEMP B-TREE'
+# Управление транзакциями плана не имеет.
+SKIPPED = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+
+def capture_view_queries(path, user):
+    """Выполняет GET path от имени user и возвращает SQL запросов view."""
+    request = RequestFactory().get(path)
+    request.user = user
+    match = resolve(request.path_info)
+    with CaptureQueriesContext(connection) as queries:
+        match.func(request, *match.args, **match.kwargs)
+    return [
+        query['sql'] for query in queries.captured_queries
+        if not query['sql'].upper().startswith(SKIPPED)
+    ]
+
+
+def explain(sql):
+    """Возвращает строки EXPLAIN QUERY PLAN для запроса."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(plan):
+    """Находит в плане полные просмотры таблиц и временные B-деревья."""
+    problems = []
+    for line in plan:
+        line = line.strip()
+        # SCAN без индекса - полный просмотр; виртуальные таблицы (FTS5)
+        # просматриваются своим индексом.
+        if line.startswith('SCAN ') and 'INDEX' not in line \
+                and 'CONSTANT ROW' not in line:
+            problems.append(f'полный просмотр: {line}')
+        elif TEMP_B_TREE in line:
+            problems.append(f'временное B-дерево: {line}')
+    return problems
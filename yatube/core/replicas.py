@@ -0,0 +1,109 @@
+"""Чтение с реплик, запись в основную базу.
+
+ReplicaRouter отправляет чтения внутри веб-запроса на случайную базу из
+DATABASE_REPLICAS, а запись и всё вне запросов (команды, воркер очереди)
+- в default. Реплика может отставать, поэтому пользователь, который
+только что что-то записал, свои следующие запросы читает из default:
+ReplicaMiddleware ставит ему cookie на REPLICA_PIN_SECONDS секунд, а
+до конца самого запроса после первой записи чтения тоже идут в default.
+
+Чтения, результат которых ложится в общий кэш, выполняются в
+read_primary(): ключи строятся из версий, которые запись меняет сразу,
+и данные отстающей реплики легли бы под новую версию у всех посетителей
+до конца таймаута. Сами страницы читаются с реплик; валидаторы таких
+ответов снимает core.page_cache.replica_safe_condition, пока реплика
+может не видеть последнюю запись.
+
+Без реплик middleware отключается, а роутер ничего не решает.
+Локально репликой служит копия файла SQLite (см. DB_REPLICAS в
+settings): копия не получает новых записей и показывает то же, что
+отстающая реплика.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'read_primary'
+_local = threading.local()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS:
+            return None
+        if (
+            getattr(_local, 'replicas', False)
+            and not _local.pinned
+            and not getattr(_local, 'primary', False)
+        ):
+            _local.used_replica = True
+            return random.choice(settings.DATABASE_REPLICAS)
+        # Явно default: иначе Django взял бы базу объекта из подсказки
+        # instance, а тот мог быть прочитан с реплики.
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _local.pinned = _local.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Во всех базах одни и те же данные.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+@contextmanager
+def read_primary():
+    """Чтения внутри блока (или декорированной функции) идут в default."""
+    previous = getattr(_local, 'primary', False)
+    _local.primary = True
+    try:
+        yield
+    finally:
+        _local.primary = previous
+
+
+def used_replica():
+    """Читал ли текущий запрос что-нибудь с реплики."""
+    return getattr(_local, 'used_replica', False)
+
+
+def _pinned(request):
+    try:
+        return float(request.COOKIES[PIN_COOKIE]) > time.time()
+    except (KeyError, ValueError):
+        return False
+
+
+class ReplicaMiddleware:
+    """Читает с реплик, пока пользователь недавно ничего не записал."""
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.replicas = True
+        _local.pinned = _pinned(request)
+        _local.wrote = _local.used_replica = False
+        try:
+            response = self.get_response(request)
+            wrote = _local.wrote
+        finally:
+            _local.replicas = _local.pinned = _local.wrote = False
+            _local.used_replica = False
+        if wrote:
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE, str(time.time() + seconds), max_age=seconds,
+                httponly=True, samesite='Lax',
+            )
+        return response
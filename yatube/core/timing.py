@@ -0,0 +1,187 @@
+"""Замеры запроса для заголовка Server-Timing и журнала.
+
+ServerTimingMiddleware считает для каждого запроса SQL-запросы и их
+время, время рендеринга шаблонов, попадания и промахи кэша и имя view,
+отдаёт их в заголовке Server-Timing и пишет строкой JSON в журнал
+core.timing. Шаблоны и кэш замеряются обёртками, которые ставятся один
+раз при включении и без текущего запроса ничего не делают.
+
+С SERVER_TIMING = False middleware отключается через MiddlewareNotUsed:
+ни обёрток, ни лишних вызовов в запросе.
+"""
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+_local = threading.local()
+_MISSING = object()
+
+
+class RequestTiming:
+    """Счётчики одного запроса."""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_ms += (time.perf_counter() - start) * 1000
+
+    def as_dict(self, view, total_ms):
+        return {
+            'view': view,
+            'total_ms': round(total_ms, 3),
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_ms, 3),
+            'template_ms': round(self.template_ms, 3),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def current():
+    return getattr(_local, 'timing', None)
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, *args, **kwargs):
+        timing = current()
+        if timing is None:
+            return render(self, *args, **kwargs)
+        # Вложенные шаблоны (карточки внутри страницы) уже входят
+        # во время внешнего, считаем только верхний уровень.
+        timing.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            timing.template_depth -= 1
+            if not timing.template_depth:
+                timing.template_ms += (time.perf_counter() - start) * 1000
+    return wrapper
+
+
+def _counted_get(get):
+    @wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        timing = current()
+        if timing is None:
+            return get(self, key, default, version)
+        value = get(self, key, _MISSING, version)
+        if value is _MISSING:
+            timing.cache_misses += 1
+            return default
+        timing.cache_hits += 1
+        return value
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    @wraps(get_many)
+    def wrapper(self, keys, version=None):
+        found = get_many(self, keys, version)
+        timing = current()
+        if timing is not None:
+            keys = list(keys)
+            timing.cache_hits += len(found)
+            timing.cache_misses += len(keys) - len(found)
+        return found
+    return wrapper
+
+
+def install():
+    """Ставит обёртки рендеринга шаблонов и чтения кэша один раз."""
+    if not getattr(Template.render, 'timed', False):
+        Template.render = _timed_render(Template.render)
+        Template.render.timed = True
+    backends = {type(caches[alias]) for alias in settings.CACHES}
+    for backend in backends:
+        if getattr(backend.get, 'timed', False):
+            continue
+        backend.get = _counted_get(backend.get)
+        backend.get.timed = True
+        # get_many из BaseCache сам вызывает get и уже посчитан им.
+        if 'get_many' in vars(backend):
+            backend.get_many = _counted_get_many(backend.get_many)
+
+
+@contextmanager
+def track():
+    """Считает SQL, шаблоны и кэш внутри блока.
+
+    Вложенный track() (метрики и Server-Timing вместе) продолжает
+    внешние счётчики, а не заводит свои.
+    """
+    timing = current()
+    if timing is not None:
+        yield timing
+        return
+    timing = RequestTiming()
+    _local.timing = timing
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(timing.execute)
+                )
+            yield timing
+    finally:
+        _local.timing = None
+
+
+def view_name(request):
+    match = request.resolver_match
+    return match.view_name if match else ''
+
+
+def header(data):
+    """Значение Server-Timing из словаря замеров."""
+    return ', '.join((
+        f'total;dur={data["total_ms"]}',
+        f'sql;dur={data["sql_ms"]};desc="{data["sql_count"]} queries"',
+        f'tpl;dur={data["template_ms"]}',
+        f'cache;desc="hit={data["cache_hits"]} '
+        f'miss={data["cache_misses"]}"',
+        f'view;desc="{data["view"]}"',
+    ))
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with track() as timing:
+            response = self.get_response(request)
+        data = timing.as_dict(
+            view_name(request), (time.perf_counter() - start) * 1000
+        )
+        data.update(method=request.method, path=request.path,
+                    status=response.status_code)
+        response['Server-Timing'] = header(data)
+        logger.info(json.dumps(data, ensure_ascii=False))
+        return response
@@ -0,0 +1,35 @@
+"""Версии для инвалидации кэша по ключу.
+
+Версия - случайная метка в кэше, которая входит в ключи зависимых
+записей. Смена версии делает все такие записи недоступными сразу, без
+перебора ключей. Если метку вытеснили, создаётся новая случайная, так
+что устаревшая запись не совпадёт с ней ни при каких условиях.
+"""
+from uuid import uuid4
+
+from django.core.cache import cache
+
+
+def _key(name):
+    return f'version:{name}'
+
+
+def bump(*names):
+    """Меняет версии names."""
+    cache.set_many({_key(name): uuid4().hex for name in names}, None)
+
+
+def get_many(names):
+    """Возвращает словарь {name: версия}, создавая недостающие."""
+    keys = {_key(name): name for name in names}
+    found = cache.get_many(list(keys))
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, uuid4().hex, None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def get(name):
+    return get_many([name])[name]
@@ -1,5 +1,12 @@
+import hmac
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from core import metrics as metrics_registry
+
 
 def page_not_found(request, exception):
     # Переменная exception содержит отладочную информацию,
@@ -17,3 +24,24 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    """Метрики всех процессов в текстовом формате Prometheus."""
+    if not settings.METRICS:
+        raise Http404
+    # Адрес сам по себе не защищает: за прокси он всегда 127.0.0.1.
+    token = settings.METRICS_TOKEN
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    if (
+        not token
+        or not hmac.compare_digest(authorization, f'Bearer {token}')
+        or request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS
+    ):
+        raise PermissionDenied
+    # Свой процесс сбрасывается сразу, чтобы не ждать интервала.
+    metrics_registry.registry.flush()
+    return HttpResponse(
+        metrics_registry.render(*metrics_registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -0,0 +1,227 @@
+"""Генерация большого правдоподобного набора данных для нагрузочных замеров.
+
+Число постов у автора, подписчиков у пользователя и комментариев у поста
+распределены по степенному закону (Ципф): немного популярных и длинный
+хвост. Все случайные решения берутся из random.Random(seed), поэтому
+одинаковые параметры дают одинаковые данные.
+
+Строки вставляются через bulk_create пачками, сигналы не срабатывают,
+поэтому счётчики (UserStats, comments_count) считаются здесь же.
+Подписки создаются с in_feed=False: ленты читаются напрямую, пока их
+не разложит backfill_feeds.
+"""
+import random
+from datetime import timedelta
+from io import BytesIO
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.utils import timezone
+from PIL import Image
+
+from posts.bulk import bulk_insert, explicit_dates, last_id, new_ids
+from posts.models import Comment, Follow, Group, Post, User, UserStats
+
+BENCH_PASSWORD = 'bench-password'
+# Показатель степени распределения Ципфа для авторов, групп и постов.
+ZIPF_EXPONENT = 1.1
+# Параметр Парето для числа подписок одного пользователя (среднее ~3).
+FOLLOW_ALPHA = 1.5
+IMAGE_COUNT = 8
+PERIOD = timedelta(days=365)
+WORDS = (
+    'кот', 'город', 'утро', 'дорога', 'книга', 'море', 'поезд', 'чай',
+    'снег', 'друг', 'работа', 'музыка', 'вечер', 'сад', 'письмо', 'окно',
+    'река', 'лес', 'праздник', 'дождь', 'солнце', 'звезда', 'мост', 'дом',
+    'новый', 'старый', 'тихий', 'яркий', 'долгий', 'первый', 'последний',
+    'сегодня', 'вчера', 'снова', 'почти', 'очень', 'рядом', 'далеко',
+)
+
+
+def zipf_weights(count, exponent=ZIPF_EXPONENT):
+    """Накопленные веса Ципфа для random.choices(cum_weights=...)."""
+    return list(accumulate(1 / (rank + 1) ** exponent
+                           for rank in range(count)))
+
+
+def make_text(rng, words=WORDS):
+    # Длина тоже с тяжёлым хвостом: чаще короткие посты, изредка длинные.
+    length = min(int(rng.paretovariate(1.3) * 6), 400)
+    return ' '.join(rng.choices(words, k=length)).capitalize()
+
+
+def make_images(rng):
+    """Сохраняет несколько картинок, на которые будут ссылаться посты."""
+    names = []
+    for number in range(IMAGE_COUNT):
+        name = f'posts/bench/bench-{number}.png'
+        if not default_storage.exists(name):
+            color = tuple(rng.randrange(256) for _ in range(3))
+            buffer = BytesIO()
+            Image.new('RGB', (1280, 720), color).save(buffer, 'PNG')
+            name = default_storage.save(name, ContentFile(buffer.getvalue()))
+        names.append(name)
+    return names
+
+
+class BenchSeeder:
+    """Наполняет базу пользователями, группами, постами и подписками."""
+
+    def __init__(self, users, posts, groups, comments=0, image_ratio=0.05,
+                 seed=42, prefix='bench', log=None):
+        self.users = users
+        self.posts = posts
+        self.groups = groups
+        self.comments = comments
+        self.image_ratio = image_ratio
+        self.rng = random.Random(seed)
+        self.prefix = prefix
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+
+    def random_date(self):
+        return self.now - PERIOD * self.rng.random()
+
+    def seed(self):
+        if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+            # Ради скорости загрузки: данные стенда не жалко потерять.
+            # Внутри транзакции SQLite этот режим менять не даёт.
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous = OFF')
+        user_ids = self.create_users()
+        group_ids = self.create_groups()
+        post_counts = self.create_posts(user_ids, group_ids)
+        follower_counts, following_counts = self.create_follows(user_ids)
+        bulk_insert(UserStats, (
+            UserStats(
+                user_id=pk,
+                posts_count=post_counts.get(pk, 0),
+                followers_count=follower_counts.get(pk, 0),
+                following_count=following_counts.get(pk, 0),
+            )
+            for pk in user_ids
+        ))
+
+    def create_users(self):
+        after = last_id(User)
+        password = make_password(BENCH_PASSWORD)
+        bulk_insert(User, (
+            User(
+                username=f'{self.prefix}{number}',
+                password=password,
+                date_joined=self.now - PERIOD,
+            )
+            for number in range(self.users)
+        ))
+        user_ids = new_ids(User, after)
+        self.log(f'Пользователей: {len(user_ids)}')
+        return user_ids
+
+    def create_groups(self):
+        after = last_id(Group)
+        bulk_insert(Group, (
+            Group(
+                title=f'Группа {number}',
+                slug=f'{self.prefix}-group-{number}',
+                description=make_text(self.rng),
+            )
+            for number in range(self.groups)
+        ))
+        group_ids = new_ids(Group, after)
+        self.log(f'Групп: {len(group_ids)}')
+        return group_ids
+
+    def create_posts(self, user_ids, group_ids):
+        """Создаёт посты и комментарии; возвращает число постов автора."""
+        rng = self.rng
+        authors = rng.choices(
+            user_ids, cum_weights=zipf_weights(len(user_ids)), k=self.posts
+        )
+        group_weights = zipf_weights(len(group_ids)) if group_ids else None
+        images = make_images(rng) if self.image_ratio else []
+        # Комментарии распределяются по постам заранее, чтобы сразу
+        # записать comments_count без отдельного UPDATE.
+        commented = rng.choices(
+            range(self.posts), cum_weights=zipf_weights(self.posts),
+            k=self.comments
+        ) if self.posts else []
+        comments_count = [0] * self.posts
+        for index in commented:
+            comments_count[index] += 1
+
+        def posts():
+            for index, author_id in enumerate(authors):
+                group_id = None
+                if group_ids and rng.random() < 0.5:
+                    group_id = rng.choices(
+                        group_ids, cum_weights=group_weights
+                    )[0]
+                image = ''
+                if images and rng.random() < self.image_ratio:
+                    image = rng.choice(images)
+                yield Post(
+                    text=make_text(rng),
+                    pub_date=self.random_date(),
+                    author_id=author_id,
+                    group_id=group_id,
+                    image=image,
+                    comments_count=comments_count[index],
+                )
+
+        after = last_id(Post)
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            bulk_insert(Post, posts())
+        post_ids = new_ids(Post, after)
+        self.log(f'Постов: {len(post_ids)}')
+
+        def comments():
+            for index in commented:
+                yield Comment(
+                    post_id=post_ids[index],
+                    author_id=rng.choice(user_ids),
+                    text=make_text(rng),
+                    created=self.random_date(),
+                )
+
+        with explicit_dates(Comment._meta.get_field('created')):
+            bulk_insert(Comment, comments())
+        self.log(f'Комментариев: {len(commented)}')
+        counts = {}
+        for author_id in authors:
+            counts[author_id] = counts.get(author_id, 0) + 1
+        return counts
+
+    def create_follows(self, user_ids):
+        """Создаёт подписки; возвращает числа подписчиков и подписок."""
+        rng = self.rng
+        # Подписываются чаще на популярных: порядок популярности свой,
+        # не совпадающий с порядком авторов постов.
+        popular = user_ids[:]
+        rng.shuffle(popular)
+        weights = zipf_weights(len(popular))
+        followers = {}
+        following = {}
+
+        def follows():
+            for user_id in user_ids:
+                wanted = min(
+                    int(rng.paretovariate(FOLLOW_ALPHA)), len(user_ids) - 1
+                )
+                authors = set()
+                for _ in range(wanted * 2):
+                    if len(authors) >= wanted:
+                        break
+                    author_id = rng.choices(popular, cum_weights=weights)[0]
+                    if author_id != user_id:
+                        authors.add(author_id)
+                following[user_id] = len(authors)
+                for author_id in sorted(authors):
+                    followers[author_id] = followers.get(author_id, 0) + 1
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        bulk_insert(Follow, follows())
+        self.log(f'Подписок: {sum(following.values())}')
+        return followers, following
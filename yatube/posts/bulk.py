@@ -0,0 +1,53 @@
+"""Помощники массовой вставки строк для seed_bench и import_posts."""
+from contextlib import contextmanager
+from itertools import islice
+
+from django.db import transaction
+
+BATCH_SIZE = 5000
+
+
+def batches(objects, size=BATCH_SIZE):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_insert(model, objects):
+    """Вставляет объекты пачками в одной транзакции.
+
+    Пачка BATCH_SIZE ограничивает память, а размер отдельного INSERT
+    Django подбирает сам под лимиты базы.
+    """
+    with transaction.atomic():
+        for batch in batches(objects):
+            model.objects.bulk_create(batch)
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Временно отключает auto_now_add, чтобы задать даты из прошлого."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def new_ids(model, after):
+    """pk строк, вставленных после after, в порядке вставки."""
+    return list(
+        model.objects.filter(pk__gt=after).order_by('pk')
+        .values_list('pk', flat=True)
+    )
+
+
+def last_id(model):
+    return model.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first() or 0
@@ -0,0 +1,54 @@
+"""Кэш отрендеренных карточек постов.
+
+Ключ карточки содержит версии (core.versions) поста, его группы и
+автора. Сигналы меняют версию при сохранении или удалении объекта,
+поэтому старые карточки просто перестают читаться и вытесняются сами.
+Карточки постов, прочитанных с реплики, не кэшируются: реплика могла
+ещё не получить запись, которая сменила версию.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core import versions
+
+CARD_TEMPLATE = 'posts/includes/post_list.html'
+
+
+def bump_version(kind, pk):
+    """Делает недействительными карточки, зависящие от объекта."""
+    versions.bump(f'post-card:{kind}:{pk}')
+
+
+def _dependencies(post):
+    return (
+        f'post-card:post:{post.pk}',
+        f'post-card:group:{post.group_id}',
+        f'post-card:author:{post.author_id}',
+    )
+
+
+def get_cards(posts):
+    """Возвращает пары (пост, HTML карточки), собирая их из кэша."""
+    posts = list(posts)
+    stamps = versions.get_many({
+        name for post in posts for name in _dependencies(post)
+    })
+    keys = [
+        'post-card:{}:{}'.format(post.pk, ':'.join(
+            stamps[name] for name in _dependencies(post)
+        ))
+        for post in posts
+    ]
+    cards = cache.get_many(keys)
+    rendered = {}
+    for post, key in zip(posts, keys):
+        if key not in cards:
+            cards[key] = render_to_string(CARD_TEMPLATE, {'post': post})
+            if post._state.db == DEFAULT_DB_ALIAS:
+                rendered[key] = cards[key]
+    if rendered:
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+    return [(post, mark_safe(cards[key])) for post, key in zip(posts, keys)]
@@ -0,0 +1,57 @@
+"""Постраничные комментарии к посту.
+
+Комментарии листаются курсором по (created, pk) страницами по
+COMMENTS_PER_PAGE. Первая страница открывается с каждым постом, поэтому
+она кэшируется: в ключе версия комментариев поста, которую сигналы
+меняют при сохранении (в том числе из add_comment) и удалении
+комментария.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from core import versions
+from core.paginator import CursorPaginator
+from core.replicas import read_primary
+from posts.models import Comment
+
+COMMENT_ORDERING = ('created', 'pk')
+
+
+def _version_name(post_id):
+    return f'post-comments:{post_id}'
+
+
+def bump_comments(post_id):
+    """Делает недействительной закэшированную первую страницу."""
+    versions.bump(_version_name(post_id))
+
+
+def get_comments_page(post_id, after=None):
+    """Страница комментариев поста после курсора after."""
+    # Автор нужен только ради имени: в кэш не попадут хэши паролей.
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    ).only('created', 'text', 'post', 'author__username')
+    paginator = CursorPaginator(
+        comments,
+        settings.COMMENTS_PER_PAGE,
+        COMMENT_ORDERING,
+    )
+    return paginator.get_page(after=after)
+
+
+def get_first_comments(post_id):
+    """Первая страница: список комментариев и курсор следующей.
+
+    В кэш кладётся список, а не Page: вместе с Page сериализовался бы
+    queryset пагинатора, то есть все комментарии поста.
+    """
+    key = f'post-comments:{post_id}:{versions.get(_version_name(post_id))}'
+    first = cache.get(key)
+    if first is None:
+        # В кэш - только из основной базы: реплика может отставать.
+        with read_primary():
+            page_obj = get_comments_page(post_id)
+            first = (list(page_obj), page_obj.next_cursor)
+        cache.set(key, first, settings.POST_COMMENTS_CACHE_TIMEOUT)
+    return first
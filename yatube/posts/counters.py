@@ -0,0 +1,111 @@
+"""Денормализованные счётчики постов, подписчиков и комментариев.
+
+Счётчики меняются атомарно через F() из сигналов моделей, а
+recount_stats пересчитывает их целиком, если они разошлись с данными.
+"""
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.bulk import batches
+from posts.models import Comment, Follow, Post, User, UserStats
+
+
+def _count(queryset, field):
+    """Подзапрос с количеством строк queryset на OuterRef('pk')."""
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def _user_counts():
+    return {
+        'posts_count': _count(Post.objects.all(), 'author'),
+        'followers_count': _count(Follow.objects.all(), 'author'),
+        'following_count': _count(Follow.objects.all(), 'user'),
+    }
+
+
+def get_user_stats(user):
+    """Возвращает счётчики пользователя, создавая их при отсутствии."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        counts = User.objects.filter(pk=user.pk).values(
+            **_user_counts()
+        ).get()
+        stats, _ = UserStats.objects.get_or_create(user=user, defaults=counts)
+        return stats
+
+
+def _shift(queryset, field, delta, **values):
+    # Не уводим счётчик в минус, если он уже разошёлся с данными.
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta}, **values)
+
+
+def change_user_stats(user_id, field, delta, **values):
+    """Атомарно сдвигает счётчик пользователя на delta.
+
+    values - другие поля, которые запишутся тем же UPDATE. Если строки
+    счётчиков ещё нет, её целиком посчитает get_user_stats.
+    """
+    _shift(UserStats.objects.filter(user_id=user_id), field, delta, **values)
+
+
+def change_comments_count(post_id, delta):
+    _shift(Post.objects.filter(pk=post_id), 'comments_count', delta)
+
+
+def create_missing_user_stats():
+    """Создаёт посчитанные строки счётчиков тем, у кого их ещё нет.
+
+    Возвращает число созданных строк.
+    """
+    missing = User.objects.filter(stats__isnull=True).values(
+        'pk', **_user_counts()
+    )
+
+    def rows():
+        for counts in missing.iterator():
+            yield UserStats(user_id=counts.pop('pk'), **counts)
+
+    created = 0
+    # batch_size не передаём: в Django 2.2 он не урезается под лимит
+    # SQLite на число строк в одном INSERT, размер подберёт сама база.
+    for batch in batches(rows()):
+        UserStats.objects.bulk_create(batch, ignore_conflicts=True)
+        created += len(batch)
+    return created
+
+
+def recount_user_stats():
+    """Пересчитывает разошедшиеся счётчики всех пользователей.
+
+    Возвращает число исправленных строк.
+    """
+    create_missing_user_stats()
+    return _repair(UserStats.objects.all(), _user_counts())
+
+
+def recount_comments():
+    """Пересчитывает разошедшиеся счётчики комментариев постов."""
+    return _repair(Post.objects.all(), {
+        'comments_count': _count(Comment.objects.all(), 'post'),
+    })
+
+
+def _repair(queryset, counts):
+    drift = Q()
+    for field in counts:
+        drift |= ~Q(**{field: F(f'actual_{field}')})
+    drifted = queryset.annotate(**{
+        f'actual_{field}': expression for field, expression in counts.items()
+    }).filter(drift)
+    return queryset.filter(
+        pk__in=drifted.values('pk')
+    ).update(**counts)
@@ -0,0 +1,107 @@
+"""Потоковая выгрузка постов автора или группы в NDJSON или CSV.
+
+Посты читаются по ключу pk пачками по EXPORT_CHUNK_SIZE: каждая пачка -
+отдельный короткий запрос WHERE pk > последнего, строки которого
+обходятся через .iterator() без кэша QuerySet. Поэтому память не
+зависит от размера выгрузки, а SQLite не держит открытый курсор всё
+время отдачи ответа.
+
+Записи имеют тот же вид, что читает import_posts: комментарии идут
+после своих постов и ссылаются на них по id.
+"""
+import csv
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from posts.models import Comment
+
+FORMATS = ('ndjson', 'csv')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+CSV_FIELDS = (
+    'type', 'id', 'post', 'author', 'group', 'text', 'pub_date', 'created',
+    'image', 'image_url',
+)
+
+
+def keyset_chunks(queryset, size):
+    """Обходит queryset пачками по возрастанию pk."""
+    last = 0
+    while True:
+        chunk = list(
+            queryset.filter(pk__gt=last).order_by('pk')[:size]
+            .iterator(chunk_size=size)
+        )
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]['pk']
+
+
+def export_records(posts, comments=False, images=False, image_url=None,
+                   chunk_size=None):
+    """Выгружает посты (и комментарии к ним) словарями по одному.
+
+    image_url(name) строит адрес картинки; по умолчанию адрес хранилища.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    image_url = image_url or default_storage.url
+    rows = posts.values(
+        'pk', 'author__username', 'group__slug', 'text', 'pub_date', 'image'
+    )
+    for chunk in keyset_chunks(rows, chunk_size):
+        for row in chunk:
+            record = {
+                'type': 'post',
+                'id': row['pk'],
+                'author': row['author__username'],
+                'group': row['group__slug'],
+                'text': row['text'],
+                'pub_date': row['pub_date'].isoformat(),
+            }
+            if images and row['image']:
+                record['image'] = row['image']
+                record['image_url'] = image_url(row['image'])
+            yield record
+        if comments:
+            yield from comment_records(
+                [row['pk'] for row in chunk], chunk_size
+            )
+
+
+def comment_records(post_ids, chunk_size):
+    rows = Comment.objects.filter(post_id__in=post_ids).order_by(
+        'post_id', 'created', 'pk'
+    ).values('pk', 'post_id', 'author__username', 'text', 'created')
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield {
+            'type': 'comment',
+            'id': row['pk'],
+            'post': row['post_id'],
+            'author': row['author__username'],
+            'text': row['text'],
+            'created': row['created'].isoformat(),
+        }
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def render_records(records, format='ndjson'):
+    """Превращает записи в поток строк выбранного формата."""
+    if format == 'csv':
+        writer = csv.DictWriter(Echo(), CSV_FIELDS)
+        yield writer.writeheader()
+        for record in records:
+            yield writer.writerow(record)
+        return
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
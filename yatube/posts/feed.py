@@ -0,0 +1,167 @@
+"""Материализованная лента подписок (fan-out on write).
+
+Новый пост раскладывается в FeedEntry всем подписчикам автора, у
+которых Follow.in_feed=True. Посты остальных авторов (новые подписки до
+бэкфилла и авторы с числом подписчиков больше FEED_FANOUT_LIMIT) лента
+дочитывает напрямую из Post и сливает с материализованной частью.
+
+Посты, вставленные bulk_create без сигналов (импорт), раскладывает
+fan_out_posts пачкой.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from core.paginator import CursorPaginator, MergedCursorPaginator
+from posts.bulk import batches
+from posts.follows import forget_following, get_pulled_author_ids
+from posts.models import FeedEntry, Follow, Post
+from posts.utils import FEED_ORDERING
+
+ENTRY_ORDERING = ('-pub_date', '-post_id')
+
+
+def _bulk_insert(entries):
+    FeedEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост в ленты подписчиков автора."""
+    follows = Follow.objects.filter(author_id=post.author_id, in_feed=True)
+    if follows.count() > settings.FEED_FANOUT_LIMIT:
+        # Популярный автор: переводим всех подписчиков на чтение напрямую.
+        user_ids = list(follows.values_list('user_id', flat=True))
+        follows.update(in_feed=False)
+        forget_following(*user_ids)
+        return
+    entries = []
+    for user_id in follows.values_list('user_id', flat=True).iterator():
+        entries.append(FeedEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        ))
+        if len(entries) >= settings.FEED_BATCH_SIZE:
+            _bulk_insert(entries)
+            entries = []
+    _bulk_insert(entries)
+
+
+def fan_out_posts(posts):
+    """Раскладывает пачку новых постов с известными pk в ленты.
+
+    То же, что fan_out_post для каждого поста, но с одним запросом
+    подписчиков на каждые 500 авторов: так можно звать её в транзакции
+    импорта после bulk_create.
+    """
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    # Не больше 500 id в одном IN: старые сборки SQLite не принимают
+    # больше 999 параметров запроса.
+    for authors in batches(by_author, 500):
+        follows = Follow.objects.filter(author_id__in=authors, in_feed=True)
+        popular = [
+            author_id for author_id, followers in follows.values(
+                'author_id'
+            ).annotate(followers=Count('pk')).values_list(
+                'author_id', 'followers'
+            ) if followers > settings.FEED_FANOUT_LIMIT
+        ]
+        if popular:
+            popular_follows = follows.filter(author_id__in=popular)
+            user_ids = list(popular_follows.values_list('user_id', flat=True))
+            popular_follows.update(in_feed=False)
+            forget_following(*user_ids)
+        entries = []
+        rows = follows.exclude(author_id__in=popular).values_list(
+            'author_id', 'user_id'
+        )
+        for author_id, user_id in rows.iterator():
+            for post in by_author[author_id]:
+                entries.append(FeedEntry(
+                    user_id=user_id,
+                    post_id=post.pk,
+                    author_id=author_id,
+                    pub_date=post.pub_date,
+                ))
+            if len(entries) >= settings.FEED_BATCH_SIZE:
+                _bulk_insert(entries)
+                entries = []
+        _bulk_insert(entries)
+
+
+def backfill_follow(follow):
+    """Раскладывает все посты автора в ленту подписчика.
+
+    Возвращает False, если автор слишком популярен и его посты
+    остаются на чтении напрямую.
+    """
+    followers = Follow.objects.filter(author_id=follow.author_id).count()
+    if followers > settings.FEED_FANOUT_LIMIT:
+        return False
+    with transaction.atomic():
+        remove_author(follow.user_id, follow.author_id)
+        # Флаг ставится до копирования: пост, созданный параллельно,
+        # попадёт в ленту через fan_out_post, дубль отсечёт ограничение.
+        Follow.objects.filter(pk=follow.pk).update(in_feed=True)
+        posts = Post.objects.filter(author_id=follow.author_id).values_list(
+            'pk', 'pub_date'
+        )
+        entries = []
+        for post_id, pub_date in posts.iterator():
+            entries.append(FeedEntry(
+                user_id=follow.user_id,
+                post_id=post_id,
+                author_id=follow.author_id,
+                pub_date=pub_date,
+            ))
+            if len(entries) >= settings.FEED_BATCH_SIZE:
+                _bulk_insert(entries)
+                entries = []
+        _bulk_insert(entries)
+    forget_following(follow.user_id)
+    return True
+
+
+def remove_author(user_id, author_id):
+    """Убирает посты автора из ленты пользователя."""
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def get_feed_page(request, user):
+    """Возвращает страницу ленты подписок пользователя."""
+    pulled_authors = get_pulled_author_ids(user)
+    entries = (
+        FeedEntry.objects.filter(user=user)
+        .exclude(author_id__in=pulled_authors)
+        .select_related('post__author', 'post__group')
+    )
+    paginators = [
+        CursorPaginator(entries, settings.PER_PAGE, ENTRY_ORDERING)
+    ]
+    if pulled_authors:
+        paginators.append(CursorPaginator(
+            Post.objects.filter(
+                author_id__in=pulled_authors
+            ).select_related('author', 'group'),
+            settings.PER_PAGE,
+            FEED_ORDERING,
+        ))
+    paginator = MergedCursorPaginator(paginators, settings.PER_PAGE)
+    page_obj = paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    page_obj.object_list = [
+        obj.post if isinstance(obj, FeedEntry) else obj
+        for obj in page_obj.object_list
+    ]
+    return page_obj
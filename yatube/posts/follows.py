@@ -0,0 +1,126 @@
+"""Кэш подписок пользователя.
+
+Для каждого пользователя в кэше лежит словарь {id автора: in_feed} всех
+его подписок: по нему views и шаблоны решают, какую кнопку показать, а
+лента - каких авторов дочитывать напрямую. Словарь читается из базы
+один раз и запоминается ещё и на объекте пользователя до конца запроса.
+Кэш может ненадолго отстать от базы (чтение, опередившее
+forget_following), поэтому подписка и отписка по нему не проверяются и
+всегда идут в базу.
+
+Запись удаляют сигналы Follow (profile_follow, profile_unfollow, админка)
+и места, которые меняют подписки в обход сигналов: bulk_create импорта
+и update() флага in_feed в ленте.
+
+Списки подписчиков автора и подписок пользователя листаются курсором по
+id второй стороны подписки: уникальное ограничение (user, author)
+модели Follow и индекс follow-author-user отдают такую страницу без
+сортировки и OFFSET при любом числе подписчиков. Первая страница
+кэшируется под версией списка, которую меняют те же сигналы и импорт.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from core import versions
+from core.paginator import CursorPaginator
+from core.replicas import read_primary
+from posts.models import Follow
+
+# Вид списка: (поле владельца списка, показываемый пользователь).
+FOLLOW_LISTS = {
+    'followers': ('author_id', 'user'),
+    'following': ('user_id', 'author'),
+}
+
+
+def _key(user_id):
+    return f'following:{user_id}'
+
+
+def forget_following(*user_ids):
+    """Удаляет закэшированные подписки пользователей."""
+    cache.delete_many([_key(user_id) for user_id in user_ids])
+
+
+def get_follow_graph(user):
+    """Подписки пользователя по кэшу: {id автора: in_feed}.
+
+    Не точная копия базы: после записи кэш может ненадолго отстать.
+    """
+    if not user.is_authenticated:
+        return {}
+    graph = getattr(user, '_follow_graph', None)
+    if graph is None:
+        graph = cache.get(_key(user.pk))
+        if graph is None:
+            # В кэш - только из основной базы: реплика может отставать.
+            with read_primary():
+                graph = dict(Follow.objects.filter(
+                    user_id=user.pk
+                ).values_list('author_id', 'in_feed'))
+            cache.set(_key(user.pk), graph, settings.FOLLOWING_CACHE_TIMEOUT)
+        user._follow_graph = graph
+    return graph
+
+
+def get_following_ids(user):
+    """Множество id авторов, на которых подписан пользователь."""
+    return get_follow_graph(user).keys()
+
+
+def get_pulled_author_ids(user):
+    """Авторы, чьи посты лента читает напрямую, а не из FeedEntry."""
+    return [
+        author_id
+        for author_id, in_feed in get_follow_graph(user).items()
+        if not in_feed
+    ]
+
+
+def _list_version_name(kind, user_id):
+    return f'follow-list:{kind}:{user_id}'
+
+
+def bump_follow_lists(*follows):
+    """Делает недействительными первые страницы списков подписок."""
+    names = set()
+    for follow in follows:
+        names.add(_list_version_name('followers', follow.author_id))
+        names.add(_list_version_name('following', follow.user_id))
+    if names:
+        versions.bump(*names)
+
+
+def get_follow_list_page(kind, user_id, after=None):
+    """Страница списка kind пользователя user_id после курсора after."""
+    owner, person = FOLLOW_LISTS[kind]
+    # Из пользователя нужны только имена: в кэш не попадут хэши паролей.
+    follows = Follow.objects.filter(**{owner: user_id}).select_related(
+        person
+    ).only(
+        person, f'{person}__username', f'{person}__first_name',
+        f'{person}__last_name',
+    )
+    paginator = CursorPaginator(
+        follows, settings.FOLLOWS_PER_PAGE, (f'{person}_id',)
+    )
+    return paginator.get_page(after=after)
+
+
+def get_follow_list(kind, user_id, after=None):
+    """Пользователи из списка kind и курсор следующей страницы."""
+    person = FOLLOW_LISTS[kind][1]
+    if after:
+        page_obj = get_follow_list_page(kind, user_id, after)
+        follows, next_cursor = list(page_obj), page_obj.next_cursor
+    else:
+        name = _list_version_name(kind, user_id)
+        key = f'{name}:{versions.get(name)}'
+        first = cache.get(key)
+        if first is None:
+            with read_primary():
+                page_obj = get_follow_list_page(kind, user_id)
+                first = (list(page_obj), page_obj.next_cursor)
+            cache.set(key, first, settings.FOLLOW_LISTS_CACHE_TIMEOUT)
+        follows, next_cursor = first
+    return [getattr(follow, person) for follow in follows], next_cursor
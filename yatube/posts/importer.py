@@ -0,0 +1,294 @@
+"""Потоковый импорт постов, комментариев и подписок из NDJSON или CSV.
+
+Записи читаются по одной и копятся пачками; каждая пачка вставляется
+через bulk_create в своей транзакции вместе с позицией в источнике
+(ImportCheckpoint), поэтому после падения импорт продолжается с первой
+незагруженной записи. Память не растёт с размером источника: в ней
+только текущая пачка и LRU-кэши id авторов и групп.
+
+Форматы записей (поле type, по умолчанию post):
+    post:    id, author, group, text, pub_date, image
+    comment: post (id поста в источнике), author, text, created
+    follow:  user, author
+
+bulk_create не вызывает сигналы, поэтому после импорта счётчики
+пересчитываются целиком. Новые посты в той же транзакции пачки
+раскладываются в ленты подписчиков (feed.fan_out_posts), а
+импортированные подписки читаются напрямую до backfill_feeds.
+"""
+import csv
+import json
+from collections import OrderedDict
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.bulk import explicit_dates, last_id, new_ids
+from posts.feed import fan_out_posts
+from posts.follows import bump_follow_lists, forget_following
+from posts.models import (Comment, Follow, Group, ImportCheckpoint,
+                          ImportedPost, Post, User)
+from posts.suggestions import mark_stale
+
+
+class RecordError(ValueError):
+    """Запись источника нельзя загрузить."""
+
+
+def read_records(stream, format='ndjson'):
+    """Читает записи из потока по одной."""
+    if format == 'csv':
+        for row in csv.DictReader(stream):
+            yield {key: value for key, value in row.items() if value != ''}
+        return
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+class LookupCache:
+    """Ограниченный LRU-кэш значение поля -> pk."""
+
+    def __init__(self, model, field, size):
+        self.model = model
+        self.field = field
+        self.size = size
+        self.ids = OrderedDict()
+
+    def resolve(self, keys):
+        """Возвращает pk для известных keys одним запросом на промахи."""
+        found = {}
+        missing = set()
+        for key in keys:
+            if key in self.ids:
+                self.ids.move_to_end(key)
+                found[key] = self.ids[key]
+            else:
+                missing.add(key)
+        if missing:
+            rows = self.model.objects.filter(**{
+                f'{self.field}__in': missing
+            }).values_list(self.field, 'pk')
+            for key, pk in rows:
+                found[key] = pk
+                self.ids[key] = pk
+        while len(self.ids) > self.size:
+            self.ids.popitem(last=False)
+        return found
+
+
+def parse_date(value):
+    if value is None:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise RecordError(f'неверная дата {value}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
+
+
+def source_id(value):
+    """id из источника как строка: в NDJSON он бывает числом."""
+    return None if value in (None, '') else str(value)
+
+
+def require(record, *fields):
+    for field in fields:
+        if not record.get(field):
+            raise RecordError(f'нет поля {field}')
+
+
+class PostImporter:
+    """Загружает записи пачками с сохранением позиции в источнике."""
+
+    def __init__(self, name, batch_size=1000, cache_size=100000,
+                 create_users=False, max_errors=100, log=None):
+        self.name = name
+        self.batch_size = batch_size
+        self.create_users = create_users
+        self.max_errors = max_errors
+        self.log = log or (lambda message: None)
+        self.users = LookupCache(User, 'username', cache_size)
+        self.groups = LookupCache(Group, 'slug', cache_size)
+        self.stats = dict.fromkeys(
+            ('post', 'comment', 'follow', 'duplicate', 'error'), 0
+        )
+
+    def run(self, records, restart=False):
+        """Загружает записи; возвращает счётчики загруженного."""
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            name=self.name
+        )
+        if restart:
+            checkpoint.position = 0
+        skip = checkpoint.position
+        if skip:
+            self.log(f'Продолжаем после записи {skip}')
+        self.checkpoint = checkpoint
+        pending = []
+        number = skip
+        for number, record in enumerate(records, 1):
+            if number <= skip:
+                continue
+            pending.append((number, record))
+            if len(pending) >= self.batch_size:
+                self.flush(pending, number)
+                pending = []
+        if pending:
+            self.flush(pending, number)
+        return self.stats
+
+    def error(self, number, message):
+        self.stats['error'] += 1
+        self.log(f'Запись {number}: {message}')
+        if self.stats['error'] > self.max_errors:
+            raise RecordError(
+                f'Ошибок больше {self.max_errors}, импорт остановлен'
+            )
+
+    def flush(self, pending, position):
+        """Вставляет пачку и сдвигает позицию в одной транзакции."""
+        with transaction.atomic():
+            # Первая запись в транзакции: в SQLite она же берёт
+            # блокировку записи, и id новых постов идут подряд.
+            ImportCheckpoint.objects.filter(pk=self.checkpoint.pk).update(
+                position=position, updated=timezone.now()
+            )
+            by_type = {'post': [], 'comment': [], 'follow': []}
+            for number, record in pending:
+                record_type = record.get('type', 'post')
+                if record_type not in by_type:
+                    self.error(number, f'неизвестный тип {record_type}')
+                    continue
+                by_type[record_type].append((number, record))
+            users = self.resolve_users(pending)
+            self.insert_posts(by_type['post'], users)
+            self.insert_follows(by_type['follow'], users)
+            self.insert_comments(by_type['comment'], users)
+        self.checkpoint.position = position
+        self.log(f'Загружено записей: {position}')
+
+    def resolve_users(self, pending):
+        names = set()
+        for _, record in pending:
+            for field in ('author', 'user'):
+                if isinstance(record.get(field), str):
+                    names.add(record[field])
+        users = self.users.resolve(names)
+        missing = names - set(users)
+        if missing and self.create_users:
+            password = make_password(None)
+            User.objects.bulk_create(
+                [User(username=name, password=password) for name in missing],
+                ignore_conflicts=True,
+            )
+            users.update(self.users.resolve(missing))
+        return users
+
+    def user_id(self, users, name):
+        if name not in users:
+            raise RecordError(f'нет пользователя {name}')
+        return users[name]
+
+    def imported_ids(self, sources):
+        """Возвращает {id в источнике: pk поста} для уже загруженных."""
+        sources.discard(None)
+        if not sources:
+            return {}
+        return dict(ImportedPost.objects.filter(
+            source_id__in=sources
+        ).values_list('source_id', 'post_id'))
+
+    def insert_posts(self, records, users):
+        slugs = {record['group'] for _, record in records
+                 if record.get('group')}
+        groups = self.groups.resolve(slugs)
+        imported = set(self.imported_ids({
+            source_id(record.get('id')) for _, record in records
+        }))
+        posts = []
+        sources = []
+        for number, record in records:
+            try:
+                require(record, 'author', 'text')
+                source = source_id(record.get('id'))
+                if source is not None and source in imported:
+                    self.stats['duplicate'] += 1
+                    continue
+                group = record.get('group')
+                if group and group not in groups:
+                    raise RecordError(f'нет группы {group}')
+                posts.append(Post(
+                    author_id=self.user_id(users, record['author']),
+                    group_id=groups.get(group),
+                    text=record['text'],
+                    pub_date=parse_date(record.get('pub_date')),
+                    image=record.get('image', ''),
+                ))
+                sources.append(source)
+                imported.add(source)
+            except RecordError as error:
+                self.error(number, error)
+        if not posts:
+            return
+        after = last_id(Post)
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            Post.objects.bulk_create(posts)
+        post_ids = new_ids(Post, after)
+        if len(post_ids) != len(posts):
+            raise RecordError('посты вставлялись параллельно с импортом')
+        for post, pk in zip(posts, post_ids):
+            post.pk = pk
+        fan_out_posts(posts)
+        ImportedPost.objects.bulk_create(
+            ImportedPost(source_id=source, post_id=pk)
+            for source, pk in zip(sources, post_ids) if source
+        )
+        self.stats['post'] += len(posts)
+
+    def insert_comments(self, records, users):
+        post_ids = self.imported_ids({
+            source_id(record.get('post')) for _, record in records
+        })
+        comments = []
+        for number, record in records:
+            try:
+                require(record, 'post', 'author', 'text')
+                source = source_id(record['post'])
+                if source not in post_ids:
+                    raise RecordError(f'нет поста {source}')
+                comments.append(Comment(
+                    post_id=post_ids[source],
+                    author_id=self.user_id(users, record['author']),
+                    text=record['text'],
+                    created=parse_date(record.get('created')),
+                ))
+            except RecordError as error:
+                self.error(number, error)
+        with explicit_dates(Comment._meta.get_field('created')):
+            Comment.objects.bulk_create(comments)
+        self.stats['comment'] += len(comments)
+
+    def insert_follows(self, records, users):
+        follows = []
+        for number, record in records:
+            try:
+                require(record, 'user', 'author')
+                user_id = self.user_id(users, record['user'])
+                author_id = self.user_id(users, record['author'])
+                if user_id == author_id:
+                    raise RecordError('подписка на самого себя')
+                follows.append(Follow(user_id=user_id, author_id=author_id))
+            except RecordError as error:
+                self.error(number, error)
+        Follow.objects.bulk_create(follows, ignore_conflicts=True)
+        # bulk_create не шлёт сигналов, кэш подписок чистим сами.
+        user_ids = {follow.user_id for follow in follows}
+        forget_following(*user_ids)
+        bump_follow_lists(*follows)
+        mark_stale(*user_ids)
+        self.stats['follow'] += len(follows)
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from posts.feed import backfill_follow
+from posts.models import Follow
+
+
+class Command(BaseCommand):
+    help = 'Раскладывает посты в ленты подписчиков после новых подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help='Сколько подписок обработать за запуск.'
+        )
+
+    def handle(self, *args, **options):
+        popular = (
+            Follow.objects.values('author')
+            .annotate(followers=Count('pk'))
+            .filter(followers__gt=settings.FEED_FANOUT_LIMIT)
+            .values('author')
+        )
+        follows = (
+            Follow.objects.filter(in_feed=False)
+            .exclude(author__in=popular)
+            .order_by('pk')
+        )
+        if options['limit'] is not None:
+            follows = follows[:options['limit']]
+        done = 0
+        for follow in follows.iterator():
+            done += backfill_follow(follow)
+        self.stdout.write(f'Разложено подписок: {done}')
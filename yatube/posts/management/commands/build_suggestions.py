@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import QUERY_CHUNK, rebuild_all, rebuild_stale
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «кого почитать» пользователям, '
+        'чьи подписки изменились. Запускается по расписанию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать всех пользователей, а не только очередь.'
+        )
+        parser.add_argument(
+            '--batch', type=int, default=QUERY_CHUNK,
+            help='Пользователей в одной пачке.'
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        rebuild = rebuild_all if options['all'] else rebuild_stale
+        users, rows = rebuild(batch_size=options['batch'])
+        self.stdout.write(
+            f'Пользователей: {users}, рекомендаций: {rows}, '
+            f'за {time.perf_counter() - start:.1f} с'
+        )
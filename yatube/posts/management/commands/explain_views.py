@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from core.paginator import CursorPaginator
+from core.query_plans import capture_view_queries, explain, plan_problems
+from posts.models import Group, Post, User
+from posts.utils import FEED_ORDERING
+
+
+class Command(BaseCommand):
+    help = (
+        'Печатает EXPLAIN QUERY PLAN запросов view posts и отмечает '
+        'полные просмотры таблиц и временные B-деревья.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--username', default=None,
+            help='От чьего имени открывать страницы; по умолчанию '
+                 'пользователь с наибольшим числом подписок.'
+        )
+        parser.add_argument(
+            '--fail', action='store_true',
+            help='Завершиться с ошибкой, если найдены проблемы.'
+        )
+
+    def get_user(self, username):
+        if username is not None:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'Пользователь {username} не найден')
+        user = User.objects.annotate(
+            following_total=Count('follower')
+        ).order_by('-following_total', 'pk').first()
+        if user is None:
+            raise CommandError('В базе нет пользователей')
+        return user
+
+    def get_paths(self):
+        """Маршруты чтения posts на данных из базы."""
+        paths = [('index', reverse('posts:index'))]
+        first_page = CursorPaginator(
+            Post.objects.all(), settings.PER_PAGE, FEED_ORDERING
+        ).page()
+        if first_page.next_cursor:
+            paths.append((
+                'index, следующая страница',
+                f'{reverse("posts:index")}?after={first_page.next_cursor}'
+            ))
+        group = Group.objects.filter(posts__isnull=False).first()
+        if group is not None:
+            paths.append(('group_list', reverse(
+                'posts:group_list', kwargs={'slug': group.slug}
+            )))
+        post = Post.objects.select_related('author').first()
+        if post is not None:
+            paths.append(('profile', reverse(
+                'posts:profile', kwargs={'username': post.author.username}
+            )))
+            paths.append(('post_detail', reverse(
+                'posts:post_detail', kwargs={'post_id': post.pk}
+            )))
+            query = urlencode({'q': post.text[:20]})
+            paths.append(('search', f'{reverse("posts:search")}?{query}'))
+        paths.append(('follow_index', reverse('posts:follow_index')))
+        author = User.objects.annotate(
+            followers_total=Count('following')
+        ).order_by('-followers_total', 'pk').first()
+        if author is not None:
+            paths.append(('followers', reverse(
+                'posts:followers', kwargs={'username': author.username}
+            )))
+            paths.append(('following', reverse(
+                'posts:following', kwargs={'username': author.username}
+            )))
+        return paths
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('EXPLAIN QUERY PLAN есть только в SQLite')
+        user = self.get_user(options['username'])
+        total = 0
+        for name, path in self.get_paths():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name}: {path}'))
+            for number, sql in enumerate(
+                capture_view_queries(path, user), 1
+            ):
+                plan = explain(sql)
+                problems = plan_problems(plan)
+                total += len(problems)
+                self.stdout.write(f'{number}. {sql}')
+                for line in plan:
+                    self.stdout.write(f'    {line}')
+                for problem in problems:
+                    self.stdout.write(self.style.WARNING(f'    !! {problem}'))
+        message = f'Найдено проблем: {total}'
+        if total and options['fail']:
+            raise CommandError(message)
+        self.stdout.write(message)
@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import FORMATS, export_records, render_records
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты автора или группы в NDJSON или CSV '
+        'в формате import_posts.'
+    )
+
+    def add_arguments(self, parser):
+        # required=True у группы не работает с call_command в Django 2.2.
+        source = parser.add_mutually_exclusive_group()
+        source.add_argument('--author', help='Имя автора.')
+        source.add_argument('--group', help='Slug группы.')
+        parser.add_argument(
+            '--format', choices=FORMATS, default='ndjson',
+            help='Формат выгрузки.'
+        )
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки; - писать в stdout.'
+        )
+        parser.add_argument(
+            '--comments', action='store_true',
+            help='Выгружать комментарии к постам.'
+        )
+        parser.add_argument(
+            '--images', action='store_true',
+            help='Выгружать имена и адреса картинок.'
+        )
+        parser.add_argument(
+            '--chunk', type=int, default=settings.EXPORT_CHUNK_SIZE,
+            help='Постов в одном запросе к базе.'
+        )
+
+    def get_posts(self, username, slug):
+        if username is not None:
+            try:
+                return User.objects.get(username=username).posts.all()
+            except User.DoesNotExist:
+                raise CommandError(f'Пользователь {username} не найден')
+        if slug is None:
+            raise CommandError('Укажите --author или --group')
+        try:
+            return Group.objects.get(slug=slug).posts.all()
+        except Group.DoesNotExist:
+            raise CommandError(f'Группа {slug} не найдена')
+
+    def handle(self, *args, **options):
+        posts = self.get_posts(options['author'], options['group'])
+        lines = render_records(export_records(
+            posts,
+            comments=options['comments'],
+            images=options['images'],
+            chunk_size=options['chunk'],
+        ), options['format'])
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as output:
+            output.writelines(lines)
@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails, pending_posts
+
+
+class Command(BaseCommand):
+    help = 'Строит превью картинок новых и изменённых постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Число потоков в пуле; 1 - без пула, в текущем потоке.'
+        )
+        parser.add_argument(
+            '--batch', type=int, default=100,
+            help='Сколько постов брать из очереди за проход.'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а ждать новые посты.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между проходами в режиме --loop, секунды.'
+        )
+
+    def process(self, pk):
+        try:
+            return generate_thumbnails(Post.objects.get(pk=pk))
+        except Exception as error:
+            self.stderr.write(f'Пост {pk}: {error}')
+            return False
+
+    def process_in_thread(self, pk):
+        try:
+            return self.process(pk)
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        pool = None
+        if options['workers'] > 1:
+            pool = ThreadPoolExecutor(options['workers'])
+        failed = set()
+        try:
+            while True:
+                ids = list(
+                    pending_posts().exclude(pk__in=failed).order_by('pk')
+                    .values_list('pk', flat=True)[:options['batch']]
+                )
+                if pool is None:
+                    results = [self.process(pk) for pk in ids]
+                else:
+                    results = list(pool.map(self.process_in_thread, ids))
+                failed.update(
+                    pk for pk, done in zip(ids, results) if not done
+                )
+                if ids:
+                    self.stdout.write(
+                        f'Готово превью: {sum(results)} из {len(ids)}'
+                    )
+                if not options['loop']:
+                    break
+                if len(ids) < options['batch']:
+                    time.sleep(options['interval'])
+        finally:
+            if pool is not None:
+                pool.shutdown()
@@ -0,0 +1,90 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.page_cache import bump_pages
+from posts.counters import recount_comments, recount_user_stats
+from posts.importer import PostImporter, RecordError, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает посты, комментарии и подписки из NDJSON или '
+        'CSV с продолжением после сбоя.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл с записями; - читать из stdin.'
+        )
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'), default=None,
+            help='Формат; по умолчанию по расширению файла, иначе ndjson.'
+        )
+        parser.add_argument(
+            '--batch', type=int, default=1000,
+            help='Записей в одной транзакции.'
+        )
+        parser.add_argument(
+            '--checkpoint', default=None,
+            help='Имя позиции для продолжения; по умолчанию имя файла.'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать с первой записи, не продолжая с позиции.'
+        )
+        parser.add_argument(
+            '--create-users', action='store_true',
+            help='Создавать неизвестных авторов без пароля.'
+        )
+        parser.add_argument(
+            '--cache-size', type=int, default=100000,
+            help='Сколько id авторов и групп держать в памяти.'
+        )
+        parser.add_argument(
+            '--max-errors', type=int, default=100,
+            help='Остановиться, если ошибочных записей больше.'
+        )
+        parser.add_argument(
+            '--no-recount', action='store_true',
+            help='Не пересчитывать счётчики после загрузки.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format']
+        if format is None:
+            format = 'csv' if path.endswith('.csv') else 'ndjson'
+        name = options['checkpoint'] or (
+            'stdin' if path == '-' else os.path.abspath(path)
+        )
+        importer = PostImporter(
+            name,
+            batch_size=options['batch'],
+            cache_size=options['cache_size'],
+            create_users=options['create_users'],
+            max_errors=options['max_errors'],
+            log=self.stderr.write,
+        )
+        stream = sys.stdin if path == '-' else open(
+            path, encoding='utf-8', newline=''
+        )
+        try:
+            stats = importer.run(
+                read_records(stream, format), restart=options['restart']
+            )
+        except (RecordError, ValueError) as error:
+            raise CommandError(error)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        if not options['no_recount']:
+            recount_user_stats()
+            recount_comments()
+        bump_pages()
+        self.stdout.write(
+            f'Постов: {stats["post"]}, комментариев: {stats["comment"]}, '
+            f'подписок: {stats["follow"]}, повторов: {stats["duplicate"]}, '
+            f'ошибок: {stats["error"]}'
+        )
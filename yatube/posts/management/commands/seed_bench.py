@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.bench import BENCH_PASSWORD, BenchSeeder
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу большим воспроизводимым набором данных '
+        'для нагрузочных замеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument(
+            '--comments', type=int, default=None,
+            help='Число комментариев; по умолчанию четверть от постов.'
+        )
+        parser.add_argument(
+            '--image-ratio', type=float, default=0.05,
+            help='Доля постов с картинкой.'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=42,
+            help='Зерно генератора: одинаковое зерно - одинаковые данные.'
+        )
+        parser.add_argument(
+            '--prefix', default='bench',
+            help='Префикс имён пользователей и slug групп.'
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь')
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f'Пользователи с префиксом {prefix} уже есть, '
+                f'укажите другой --prefix'
+            )
+        comments = options['comments']
+        if comments is None:
+            comments = options['posts'] // 4
+        start = time.perf_counter()
+        BenchSeeder(
+            users=options['users'],
+            posts=options['posts'],
+            groups=options['groups'],
+            comments=comments,
+            image_ratio=options['image_ratio'],
+            seed=options['seed'],
+            prefix=prefix,
+            log=self.stdout.write,
+        ).seed()
+        self.stdout.write(
+            f'Готово за {time.perf_counter() - start:.1f} с. '
+            f'Пароль пользователей: {BENCH_PASSWORD}'
+        )
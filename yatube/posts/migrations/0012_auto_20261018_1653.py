@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 16:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_auto_20261018_1647'),
+    ]
+
+    operations = [
+        # Превью старых постов, как и раньше, строятся при первом показе.
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails_ready',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Превью готовы'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='thumbnails_ready',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Превью готовы'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('thumbnails_ready', False), models.Q(_negated=True, image='')), fields=['id'], name='post-thumbnails-pending'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0015_importcheckpoint_importedpost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Suggestion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Вес')),
+            ],
+            options={
+                'ordering': ('-score', 'author_id'),
+            },
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='suggestions_stale',
+            field=models.BooleanField(default=True, help_text='Подписки изменились после расчёта рекомендаций', verbose_name='Пересчитать рекомендации'),
+        ),
+        migrations.AddIndex(
+            model_name='userstats',
+            index=models.Index(condition=models.Q(suggestions_stale=True), fields=['user'], name='userstats-suggestions-stale'),
+        ),
+        migrations.AddField(
+            model_name='suggestion',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AddField(
+            model_name='suggestion',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='suggestions', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddIndex(
+            model_name='suggestion',
+            index=models.Index(fields=['user', '-score', 'author'], name='suggestion-user-score'),
+        ),
+        migrations.AddConstraint(
+            model_name='suggestion',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique-suggestion'),
+        ),
+    ]
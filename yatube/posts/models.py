@@ -52,9 +52,31 @@ class Post(models.Model):
         on_delete=models.CASCADE,
         related_name='posts'
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Комментариев'
+    )
+    thumbnails_ready = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Превью готовы'
+    )
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('-pub_date', '-id'),
+                         name='post-pub-date'),
+            models.Index(fields=('author', '-pub_date', '-id'),
+                         name='post-author-pub-date'),
+            models.Index(fields=('group', '-pub_date', '-id'),
+                         name='post-group-pub-date'),
+            models.Index(fields=('id',),
+                         condition=models.Q(thumbnails_ready=False)
+                         & ~models.Q(image=''),
+                         name='post-thumbnails-pending'),
+        )
 
     def __str__(self):
         return self.text[:30]
@@ -64,6 +86,7 @@ class Comment(CreatedModel):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
+        db_index=False,
         help_text='Пост к которому относится коментарий',
         related_name='comments',
         verbose_name='Пост'
@@ -78,6 +101,13 @@ class Comment(CreatedModel):
         verbose_name='Текст коментария'
     )
 
+    class Meta:
+        ordering = ('created', 'id')
+        indexes = (
+            models.Index(fields=('post', 'created', 'id'),
+                         name='comment-post-created'),
+        )
+
     def __str__(self):
         return self.text[:15]
 
@@ -86,6 +116,7 @@ class Follow(models.Model):
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='follower',
         help_text='Укажите подписчика',
         verbose_name='Подписчик'
@@ -93,10 +124,16 @@ class Follow(models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='following',
         help_text='Укажите Автора',
         verbose_name='Автор'
     )
+    in_feed = models.BooleanField(
+        default=False,
+        help_text='Посты автора разложены в ленту подписчика',
+        verbose_name='В ленте'
+    )
 
     def __str__(self):
         return f'{self.user} подписан на {self.author}'
@@ -106,3 +143,151 @@ class Follow(models.Model):
             models.UniqueConstraint(fields=('user', 'author',),
                                     name='unique-in-module'),
         )
+        indexes = (
+            models.Index(fields=('author', 'user'),
+                         name='follow-author-user'),
+        )
+
+
+class FeedEntry(models.Model):
+    """Строка материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ('-pub_date', '-post_id')
+        indexes = (
+            models.Index(fields=('user', '-pub_date', '-post'),
+                         name='feed-user-pub-date'),
+            models.Index(fields=('user', 'author'),
+                         name='feed-user-author'),
+        )
+        constraints = (
+            models.UniqueConstraint(fields=('user', 'post',),
+                                    name='unique-feed-entry'),
+        )
+
+    def __str__(self):
+        return f'{self.post} в ленте {self.user}'
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Постов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписок'
+    )
+    suggestions_stale = models.BooleanField(
+        default=True,
+        help_text='Подписки изменились после расчёта рекомендаций',
+        verbose_name='Пересчитать рекомендации'
+    )
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('user',),
+                         condition=models.Q(suggestions_stale=True),
+                         name='userstats-suggestions-stale'),
+        )
+
+    def __str__(self):
+        return f'Счётчики {self.user}'
+
+
+class Suggestion(models.Model):
+    """Автор, которого стоит предложить пользователю (build_suggestions)."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='suggestions',
+        verbose_name='Пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    score = models.FloatField(verbose_name='Вес')
+
+    class Meta:
+        ordering = ('-score', 'author_id')
+        indexes = (
+            models.Index(fields=('user', '-score', 'author'),
+                         name='suggestion-user-score'),
+        )
+        constraints = (
+            models.UniqueConstraint(fields=('user', 'author'),
+                                    name='unique-suggestion'),
+        )
+
+    def __str__(self):
+        return f'{self.author} для {self.user}'
+
+
+class ImportedPost(models.Model):
+    """Соответствие id поста в старой системе и поста Yatube."""
+    source_id = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='Id в источнике'
+    )
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пост'
+    )
+
+    def __str__(self):
+        return f'{self.source_id} -> {self.post_id}'
+
+
+class ImportCheckpoint(models.Model):
+    """Сколько записей источника import_posts уже загрузил."""
+    name = models.CharField(
+        max_length=200,
+        unique=True,
+        verbose_name='Источник'
+    )
+    position = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Загружено записей'
+    )
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.name}: {self.position}'
@@ -0,0 +1,50 @@
+"""Полнотекстовый поиск постов по тексту и названию группы.
+
+На SQLite поиск идёт по индексу posts_post_fts (FTS5, см. миграцию
+0013_post_fts) и ранжируется по bm25. На других базах индекса нет, и
+поиск откатывается к icontains в порядке ленты.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from posts.models import Post
+from posts.utils import FEED_ORDERING
+
+WORD = re.compile(r'\w+')
+
+
+def build_match(query):
+    """Превращает ввод пользователя в безопасное выражение MATCH.
+
+    Каждое слово берётся в кавычки и ищется по префиксу, слова
+    соединяются через AND. Пустая строка значит, что искать нечего.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(query.lower()))
+
+
+def search_posts(query, queryset=None):
+    """Возвращает посты queryset, подходящие под query, лучшие первыми."""
+    if queryset is None:
+        queryset = Post.objects.all()
+    match = build_match(query)
+    if not match:
+        return queryset.none()
+    if connection.vendor != 'sqlite':
+        condition = Q()
+        for word in WORD.findall(query):
+            condition &= (
+                Q(text__icontains=word) | Q(group__title__icontains=word)
+            )
+        return queryset.filter(condition).order_by(*FEED_ORDERING)
+    return queryset.extra(
+        tables=['posts_post_fts'],
+        where=[
+            'posts_post_fts.rowid = posts_post.id',
+            'posts_post_fts MATCH %s',
+        ],
+        params=[match],
+        select={'search_rank': 'posts_post_fts.rank'},
+        order_by=['search_rank', '-pk'],
+    )
@@ -0,0 +1,73 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.page_cache import bump_pages
+from posts import cards, comments, counters, feed, follows
+from posts.models import Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    bump_pages()
+    cards.bump_version('post', instance.pk)
+    if created:
+        counters.change_user_stats(instance.author_id, 'posts_count', 1)
+        feed.fan_out_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump_pages()
+    cards.bump_version('post', instance.pk)
+    counters.change_user_stats(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    bump_pages()
+    cards.bump_version('group', instance.pk)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Вход пользователя сохраняет только last_login: карточки не меняются.
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        bump_pages()
+        cards.bump_version('author', instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    bump_pages()
+    comments.bump_comments(instance.post_id)
+    if created:
+        counters.change_comments_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    bump_pages()
+    comments.bump_comments(instance.post_id)
+    counters.change_comments_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    bump_pages()
+    follows.forget_following(instance.user_id)
+    follows.bump_follow_lists(instance)
+    if created:
+        counters.change_user_stats(instance.author_id, 'followers_count', 1)
+        counters.change_user_stats(instance.user_id, 'following_count', 1,
+                                   suggestions_stale=True)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    bump_pages()
+    follows.forget_following(instance.user_id)
+    follows.bump_follow_lists(instance)
+    counters.change_user_stats(instance.author_id, 'followers_count', -1)
+    counters.change_user_stats(instance.user_id, 'following_count', -1,
+                               suggestions_stale=True)
+    feed.remove_author(instance.user_id, instance.author_id)
@@ -0,0 +1,227 @@
+"""Рекомендации «кого почитать».
+
+Рекомендации считает команда build_suggestions по расписанию, а страницы
+только читают готовые строки Suggestion. Вес автора для пользователя:
+- 1 за каждого, на кого пользователь подписан и кто подписан на автора
+  (друзья друзей);
+- COMMENT_WEIGHT за каждый пост, под которым автор комментировал вместе
+  с пользователем, и за каждый пост автора, который пользователь
+  комментировал.
+Сам пользователь и его подписки не предлагаются, в таблицу пишутся
+SUGGESTIONS_TOP_K лучших.
+
+Обычный запуск пересчитывает только пользователей с флагом
+UserStats.suggestions_stale: сигналы Follow ставят его тем же UPDATE,
+что сдвигает счётчик подписок, а строки счётчиков, которых ещё не
+было, создаются с ним. Подписки друзей и комментарии меняют
+рекомендации медленнее, их подхватывает полный прогон --all.
+
+Подписки читаются не по одному пользователю, а пачками id и
+запоминаются в FollowGraph; полный прогон загружает весь граф одним
+потоковым запросом, так что на граф в миллион подписок уходят минуты.
+"""
+import heapq
+from collections import Counter, defaultdict
+from itertools import chain
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.page_cache import bump_user_pages
+from core.replicas import read_primary
+from posts.bulk import batches
+from posts.counters import create_missing_user_stats
+from posts.follows import get_following_ids
+from posts.models import Comment, Follow, Post, Suggestion, User, UserStats
+
+# Вес общего комментария относительно одного пути через друга.
+COMMENT_WEIGHT = 0.5
+# Не больше стольких id в одном IN: старые сборки SQLite не принимают
+# больше 999 параметров запроса.
+QUERY_CHUNK = 500
+
+
+def _key(user_id):
+    return f'suggestions:{user_id}'
+
+
+def mark_stale(*user_ids):
+    """Ставит пользователей в очередь на пересчёт рекомендаций."""
+    for chunk in batches(user_ids, QUERY_CHUNK):
+        UserStats.objects.filter(user_id__in=chunk).update(
+            suggestions_stale=True
+        )
+
+
+class FollowGraph:
+    """Исходящие подписки пользователей, загруженные пачками."""
+
+    def __init__(self):
+        self.following = {}
+        self.complete = False
+
+    def load_all(self):
+        following = defaultdict(list)
+        rows = Follow.objects.order_by().values_list('user_id', 'author_id')
+        for user_id, author_id in rows.iterator(chunk_size=10000):
+            following[user_id].append(author_id)
+        self.following = dict(following)
+        self.complete = True
+
+    def load(self, user_ids, refresh=False):
+        """Загружает подписки user_ids; refresh - даже уже известные."""
+        if self.complete and not refresh:
+            return
+        missing = [
+            user_id for user_id in user_ids
+            if refresh or user_id not in self.following
+        ]
+        for chunk in batches(missing, QUERY_CHUNK):
+            found = {user_id: [] for user_id in chunk}
+            rows = Follow.objects.filter(user_id__in=chunk).values_list(
+                'user_id', 'author_id'
+            )
+            for user_id, author_id in rows:
+                found[user_id].append(author_id)
+            self.following.update(found)
+
+    def get(self, user_id):
+        return self.following.get(user_id, ())
+
+
+def comment_scores(user_ids):
+    """Веса по комментариям: {пользователь: Counter(автор: число постов)}."""
+    commenters = defaultdict(set)
+    rows = Comment.objects.filter(author_id__in=user_ids).order_by(
+    ).values_list('post_id', 'author_id').distinct()
+    for post_id, user_id in rows:
+        commenters[post_id].add(user_id)
+    scores = defaultdict(Counter)
+    for chunk in batches(commenters, QUERY_CHUNK):
+        # UNION без ALL: автор, комментировавший свой пост, считается
+        # за этот пост один раз.
+        related = Comment.objects.filter(post_id__in=chunk).order_by(
+        ).values_list('post_id', 'author_id').union(
+            Post.objects.filter(pk__in=chunk).order_by().values_list(
+                'pk', 'author_id'
+            )
+        )
+        authors = defaultdict(list)
+        for post_id, author_id in related:
+            authors[post_id].append(author_id)
+        for post_id, post_authors in authors.items():
+            for user_id in commenters[post_id]:
+                scores[user_id].update(post_authors)
+    return scores
+
+
+def score_authors(user_id, graph, comments):
+    """Лучшие SUGGESTIONS_TOP_K авторов для пользователя: [(автор, вес)]."""
+    following = graph.get(user_id)
+    # Counter считает пути через друзей сразу по склеенным спискам.
+    scores = Counter(chain.from_iterable(map(graph.get, following)))
+    for author_id, count in comments.get(user_id, {}).items():
+        scores[author_id] += COMMENT_WEIGHT * count
+    for author_id in (user_id, *following):
+        scores.pop(author_id, None)
+    return heapq.nlargest(
+        settings.SUGGESTIONS_TOP_K, scores.items(), key=itemgetter(1)
+    )
+
+
+def build_suggestions(user_ids, graph):
+    """Пересчитывает рекомендации пачки пользователей.
+
+    Возвращает число записанных строк.
+    """
+    # Свои подписки читаем заново: их могли изменить после загрузки.
+    graph.load(user_ids, refresh=True)
+    graph.load({
+        followee
+        for user_id in user_ids
+        for followee in graph.get(user_id)
+    })
+    comments = comment_scores(user_ids)
+    rows = [
+        Suggestion(user_id=user_id, author_id=author_id, score=score)
+        for user_id in user_ids
+        for author_id, score in score_authors(user_id, graph, comments)
+    ]
+    with transaction.atomic():
+        Suggestion.objects.filter(user_id__in=user_ids).delete()
+        # batch_size не передаём: размер INSERT подберёт сама база.
+        for batch in batches(rows):
+            Suggestion.objects.bulk_create(batch)
+    cache.delete_many([_key(user_id) for user_id in user_ids])
+    # Блок есть в профиле с ETag: без этого пользователь получал бы 304
+    # со старыми рекомендациями до первой посторонней записи.
+    bump_user_pages(*user_ids)
+    return len(rows)
+
+
+def rebuild_stale(batch_size=QUERY_CHUNK):
+    """Пересчитывает пользователей из очереди; возвращает (людей, строк).
+
+    Флаг снимается до расчёта: подписка, сделанная во время расчёта,
+    снова поставит пользователя в очередь следующего запуска.
+    """
+    # Сигналы ставят флаг только в существующую строку счётчиков, а
+    # новые строки создаются уже с флагом.
+    create_missing_user_stats()
+    graph = FollowGraph()
+    stale = UserStats.objects.filter(suggestions_stale=True)
+    users = rows = 0
+    last = 0
+    while True:
+        user_ids = list(
+            stale.filter(pk__gt=last).order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not user_ids:
+            return users, rows
+        last = user_ids[-1]
+        UserStats.objects.filter(pk__in=user_ids).update(
+            suggestions_stale=False
+        )
+        rows += build_suggestions(user_ids, graph)
+        users += len(user_ids)
+
+
+def rebuild_all(batch_size=QUERY_CHUNK):
+    """Пересчитывает всех пользователей; возвращает (людей, строк)."""
+    create_missing_user_stats()
+    UserStats.objects.filter(suggestions_stale=True).update(
+        suggestions_stale=False
+    )
+    graph = FollowGraph()
+    graph.load_all()
+    users = rows = 0
+    user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+    for batch in batches(user_ids.iterator(), batch_size):
+        rows += build_suggestions(batch, graph)
+        users += len(batch)
+    return users, rows
+
+
+def get_suggestions(user):
+    """Авторы, которых стоит показать пользователю в «Кого почитать»."""
+    if not user.is_authenticated:
+        return []
+    authors = cache.get(_key(user.pk))
+    if authors is None:
+        suggestions = Suggestion.objects.filter(
+            user_id=user.pk
+        ).select_related('author').only(
+            'author', 'author__username', 'author__first_name',
+            'author__last_name',
+        )[:settings.SUGGESTIONS_TOP_K]
+        with read_primary():
+            authors = [suggestion.author for suggestion in suggestions]
+        cache.set(_key(user.pk), authors, settings.SUGGESTIONS_CACHE_TIMEOUT)
+    # Подписки из кэша: только что выбранный автор пропадает сразу.
+    following = get_following_ids(user)
+    return [
+        author for author in authors if author.pk not in following
+    ][:settings.SUGGESTIONS_SHOWN]
@@ -0,0 +1,21 @@
+"""Фоновые задачи posts, которые выполняет manage.py runworker."""
+from posts.feed import backfill_follow
+from posts.models import Follow, Post
+from posts.thumbnails import generate_thumbnails
+from taskqueue.queue import task
+
+
+@task
+def generate_post_thumbnails(post_id):
+    """Строит превью картинки поста, если они ещё нужны."""
+    post = Post.objects.filter(pk=post_id, thumbnails_ready=False).first()
+    if post is not None and post.image:
+        generate_thumbnails(post)
+
+
+@task
+def backfill_feed(follow_id):
+    """Раскладывает посты автора в ленту нового подписчика."""
+    follow = Follow.objects.filter(pk=follow_id, in_feed=False).first()
+    if follow is not None:
+        backfill_follow(follow)
@@ -0,0 +1,11 @@
+from django import template
+
+from posts.cards import get_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Карточки постов из кэша: {% post_cards page_obj as cards %}."""
+    return get_cards(posts)
@@ -0,0 +1,72 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import TestCase, override_settings
+
+from posts.bench import BenchSeeder
+from posts.counters import recount_comments, recount_user_stats
+from posts.models import Comment, Follow, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedBenchTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def posts_per_author(self, prefix):
+        return list(
+            Post.objects.filter(author__username__startswith=prefix)
+            .values('author__username')
+            .annotate(total=Count('pk'))
+            .order_by('author__username')
+            .values_list('author__username', 'total')
+        )
+
+    def test_seed_bench_creates_data(self):
+        """seed_bench создаёт заданное число строк и верные счётчики."""
+        out = StringIO()
+        call_command(
+            'seed_bench', users=30, posts=300, groups=3, comments=50,
+            image_ratio=0.2, stdout=out,
+        )
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Comment.objects.count(), 50)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertEqual(recount_user_stats(), 0)
+        self.assertEqual(recount_comments(), 0)
+        self.assertIn('Готово', out.getvalue())
+
+    def test_authors_follow_power_law(self):
+        """У самого активного автора постов заметно больше медианы."""
+        BenchSeeder(users=50, posts=1000, groups=0, image_ratio=0).seed()
+        counts = sorted(total for _, total in self.posts_per_author('bench'))
+        self.assertGreater(counts[-1], counts[len(counts) // 2] * 5)
+
+    def test_same_seed_same_data(self):
+        """Одинаковое зерно даёт одинаковое распределение."""
+        for prefix in ('first', 'second'):
+            BenchSeeder(
+                users=20, posts=200, groups=0, image_ratio=0, seed=7,
+                prefix=prefix,
+            ).seed()
+        first = [total for _, total in self.posts_per_author('first')]
+        second = [total for _, total in self.posts_per_author('second')]
+        self.assertEqual(first, second)
+
+    def test_prefix_must_be_new(self):
+        """Повторный запуск с тем же префиксом отклоняется."""
+        User.objects.create_user(username='bench0')
+        with self.assertRaises(CommandError):
+            call_command('seed_bench', users=1, posts=1, stdout=StringIO())
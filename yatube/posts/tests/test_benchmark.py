@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.benchmark import compare, get_routes, percentile
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class BenchmarkTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(author=cls.user, text='Пост', group=group)
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.output = os.path.join(self.directory, 'bench.json')
+
+    def bench(self, **options):
+        call_command(
+            'bench_views', repeat=2, warmup=1, output=self.output,
+            stdout=StringIO(), stderr=StringIO(), **options
+        )
+        with open(self.output, encoding='utf-8') as file:
+            return json.load(file)['results']
+
+    def test_percentile(self):
+        """Перцентиль считается по ближайшему рангу."""
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile([5], 95), 5)
+
+    def test_all_routes_measured_in_both_modes(self):
+        """Каждый маршрут замерен анонимно и с входом."""
+        results = self.bench()
+        for name, _ in get_routes():
+            for mode in ('anonymous', 'user'):
+                self.assertIn(f'{name} [{mode}]', results)
+        profile = results['posts:profile [user]']
+        self.assertEqual(profile['status'], 200)
+        self.assertGreater(profile['queries'], 0)
+        self.assertGreater(profile['bytes'], 0)
+        self.assertLessEqual(profile['p50_ms'], profile['p99_ms'])
+
+    def test_regression_against_baseline_fails(self):
+        """Замедление и лишние запросы относительно базы роняют команду."""
+        results = self.bench(routes=['profile'])
+        baseline = {
+            case: dict(result, p50_ms=result['p50_ms'] / 2, queries=0)
+            for case, result in results.items()
+        }
+        problems = compare(results, baseline, min_delta_ms=0)
+        self.assertTrue(any('p50' in problem for problem in problems))
+        self.assertTrue(any('запросов' in problem for problem in problems))
+
+        path = os.path.join(self.directory, 'baseline.json')
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'results': baseline}, file)
+        with self.assertRaisesMessage(CommandError, 'posts:profile [user]'):
+            self.bench(routes=['profile'], baseline=path)
+
+    def test_same_results_pass(self):
+        """Сравнение с собой регрессий не находит."""
+        results = self.bench(routes=['about'])
+        self.assertEqual(compare(results, results), [])
@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.budgets import assert_within_budget
+from posts import urls
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+# GET этих маршрутов меняет данные, прогревать их нельзя.
+MUTATING_ROUTES = ('profile_follow', 'profile_unfollow', 'post_delete')
+
+
+class ViewBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(25):
+            cls.post = Post.objects.create(
+                author=cls.author if i % 3 else cls.other,
+                text=f'Тестовый пост {i}',
+                group=cls.group if i % 2 else None,
+            )
+        commenters = [
+            User.objects.create_user(username=f'commenter{i}')
+            for i in range(15)
+        ]
+        for commenter in commenters:
+            Comment.objects.create(
+                post=cls.post, author=commenter, text='Комментарий'
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.other)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(ViewBudgetTest.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(ViewBudgetTest.reader)
+
+    def cases(self):
+        post = ViewBudgetTest.post
+        own_post = Post.objects.filter(author=ViewBudgetTest.author).first()
+        author = {'username': 'author'}
+        return (
+            ('index', {}, self.guest_client, 'get', {}),
+            ('index', {}, self.reader_client, 'get', {}),
+            ('group_list', {'slug': 'test-slug'}, self.guest_client, 'get',
+             {}),
+            ('group_export', {'slug': 'test-slug'}, self.guest_client,
+             'get', {}),
+            ('search', {}, self.guest_client, 'get',
+             {'data': {'q': 'тестовый пост'}}),
+            ('profile', author, self.guest_client, 'get', {}),
+            ('profile', author, self.reader_client, 'get', {}),
+            ('profile_export', author, self.guest_client, 'get', {}),
+            ('followers', author, self.guest_client, 'get', {}),
+            ('following', {'username': 'reader'}, self.reader_client, 'get',
+             {}),
+            ('post_detail', {'post_id': post.pk}, self.guest_client, 'get',
+             {}),
+            ('post_detail', {'post_id': post.pk}, self.reader_client, 'get',
+             {}),
+            ('post_comments', {'post_id': post.pk}, self.guest_client,
+             'get', {}),
+            ('follow_index', {}, self.reader_client, 'get', {}),
+            ('post_create', {}, self.author_client, 'get', {}),
+            ('post_create', {}, self.author_client, 'post',
+             {'data': {'text': 'Новый пост'}}),
+            ('post_edit', {'post_id': own_post.pk}, self.author_client,
+             'get', {}),
+            ('post_edit', {'post_id': own_post.pk}, self.author_client,
+             'post', {'data': {'text': 'Правка'}}),
+            ('add_comment', {'post_id': post.pk}, self.reader_client,
+             'post', {'data': {'text': 'Ещё комментарий'}}),
+            ('profile_follow', {'username': 'other'}, self.author_client,
+             'get', {}),
+            ('profile_unfollow', author, self.reader_client, 'get', {}),
+            ('post_delete', {'post_id': own_post.pk}, self.author_client,
+             'get', {}),
+        )
+
+    def test_views_within_budget(self):
+        """Каждый маршрут posts укладывается в бюджет своей view."""
+        for name, kwargs, client, method, params in self.cases():
+            path = reverse(f'posts:{name}', kwargs=kwargs)
+            # Первый запрос создаёт ленивые счётчики. Кэш после него
+            # очищается: бюджет меряет рендер без кэша страниц и
+            # карточек, иначе лишний запрос в шаблоне его не нарушит.
+            if method == 'get' and name not in MUTATING_ROUTES:
+                client.get(path)
+            cache.clear()
+            with self.subTest(name=name, method=method):
+                assert_within_budget(client, path, method, **params)
+
+    def test_cached_guest_pages(self):
+        """Закэшированная страница для гостя не идёт в базу вовсе."""
+        paths = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+        )
+        for path in paths:
+            self.guest_client.get(path)
+            with self.subTest(path=path):
+                with CaptureQueriesContext(connection) as queries:
+                    self.guest_client.get(path)
+                self.assertEqual(len(queries), 0)
+
+    def test_every_route_is_checked(self):
+        """Все именованные маршруты posts покрыты проверкой бюджета."""
+        checked = {name for name, *_ in self.cases()}
+        routes = {
+            pattern.name for pattern in urls.urlpatterns if pattern.name
+        }
+        self.assertEqual(routes - checked, set())
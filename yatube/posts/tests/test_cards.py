@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Исходный текст',
+            group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def get_index(self):
+        return self.guest_client.get(reverse('posts:index')).content.decode()
+
+    def test_card_served_from_cache(self):
+        """Карточка берётся из кэша, пока пост не сохранён заново."""
+        self.assertIn('Исходный текст', self.get_index())
+        Post.objects.filter(pk=PostCardCacheTest.post.pk).update(
+            text='Текст в обход сигналов'
+        )
+        self.assertIn('Исходный текст', self.get_index())
+
+    def test_post_edit_invalidates_card(self):
+        self.get_index()
+        post = Post.objects.get(pk=PostCardCacheTest.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertIn('Новый текст', self.get_index())
+
+    def test_author_rename_invalidates_card(self):
+        self.get_index()
+        user = User.objects.get(pk=PostCardCacheTest.user.pk)
+        user.username = 'renamed'
+        user.save()
+        self.assertIn('renamed', self.get_index())
+
+    def test_card_survives_lost_versions(self):
+        """Вытесненные версии не возвращают устаревшую карточку."""
+        self.get_index()
+        post = Post.objects.get(pk=PostCardCacheTest.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        cache.delete('version:post-card:post:{}'.format(post.pk))
+        self.assertIn('Новый текст', self.get_index())
@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_PER_PAGE=3)
+class PostCommentsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group
+        )
+        for number in range(7):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {number}'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostCommentsTest.user)
+        self.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': PostCommentsTest.post.pk}
+        )
+
+    def texts(self, comments):
+        return [comment.text for comment in comments]
+
+    def test_first_page_on_post_detail(self):
+        """На странице поста первая страница комментариев по времени."""
+        response = self.guest_client.get(self.detail_url)
+        self.assertEqual(
+            self.texts(response.context['comments']),
+            ['Комментарий 0', 'Комментарий 1', 'Комментарий 2']
+        )
+        self.assertContains(response, 'Показать ещё комментарии')
+        self.assertNotContains(response, 'Комментарий 3')
+
+    def test_fragment_pages(self):
+        """Фрагмент отдаёт следующие страницы до последней."""
+        next_cursor = self.guest_client.get(
+            self.detail_url
+        ).context['next_cursor']
+        url = reverse(
+            'posts:post_comments', kwargs={'post_id': PostCommentsTest.post.pk}
+        )
+        response = self.guest_client.get(url, {'after': next_cursor})
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertEqual(
+            self.texts(response.context['comments']),
+            ['Комментарий 3', 'Комментарий 4', 'Комментарий 5']
+        )
+        response = self.guest_client.get(
+            url, {'after': response.context['next_cursor']}
+        )
+        self.assertEqual(
+            self.texts(response.context['comments']), ['Комментарий 6']
+        )
+        self.assertNotContains(response, 'Показать ещё комментарии')
+
+    def test_fragment_for_missing_post(self):
+        response = self.guest_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_first_page_cached(self):
+        """Повторный показ поста не читает комментарии из базы."""
+        self.guest_client.get(self.detail_url)
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(self.detail_url)
+        self.assertFalse(any(
+            '"posts_comment"."text"' in query['sql']
+            for query in queries.captured_queries
+        ))
+
+    def test_add_comment_invalidates_first_page(self):
+        Comment.objects.filter(text='Комментарий 0').delete()
+        self.guest_client.get(self.detail_url)
+        post = PostCommentsTest.post
+        Comment.objects.filter(post=post).exclude(
+            text='Комментарий 1'
+        ).delete()
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            data={'text': 'Новый комментарий'},
+        )
+        response = self.guest_client.get(self.detail_url)
+        self.assertEqual(
+            self.texts(response.context['comments']),
+            ['Комментарий 1', 'Новый комментарий']
+        )
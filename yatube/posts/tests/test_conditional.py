@@ -0,0 +1,164 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from core.page_cache import PAGES_MODIFIED
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def header_date(date):
+    return http_date(date.timestamp())
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group
+        )
+        cls.author = User.objects.create_user(username='author')
+        # Время изменения в прошлом, чтобы запись сдвинула его заметно
+        # для секундной точности заголовка.
+        cls.past = timezone.now() - timedelta(days=1)
+
+    def setUp(self):
+        cache.clear()
+        cache.set(PAGES_MODIFIED, ConditionalGetTest.past, None)
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ConditionalGetTest.user)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('posts:post_detail',
+                    kwargs={'post_id': ConditionalGetTest.post.pk}),
+        )
+
+    def test_not_modified_since(self):
+        """Анонимный запрос с If-Modified-Since получает 304 без шаблона."""
+        since = header_date(ConditionalGetTest.past)
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response['Last-Modified'], since)
+                response = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=since
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.templates, [])
+
+    def test_edit_moves_last_modified(self):
+        """Правка поста меняет Last-Modified всех его страниц."""
+        since = header_date(ConditionalGetTest.past)
+        post = ConditionalGetTest.post
+        post.text = 'Изменённый пост'
+        post.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=since
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Изменённый пост')
+
+    def rename_user(self):
+        user = User.objects.get(pk=ConditionalGetTest.user.pk)
+        user.first_name = 'Новое имя'
+        user.save()
+
+    def test_any_write_moves_last_modified(self):
+        """Удаление, подписка и переименование тоже сдвигают Last-Modified."""
+        since = header_date(ConditionalGetTest.past)
+        user = ConditionalGetTest.user
+        changes = {
+            'delete': lambda: Post.objects.create(
+                author=user, text='Ещё пост', group=ConditionalGetTest.group
+            ).delete(),
+            'follow': lambda: Follow.objects.create(
+                user=ConditionalGetTest.author, author=user
+            ),
+            'rename': self.rename_user,
+        }
+        for name, change in changes.items():
+            with self.subTest(change=name):
+                cache.set(PAGES_MODIFIED, ConditionalGetTest.past, None)
+                change()
+                for url in self.urls:
+                    response = self.guest_client.get(
+                        url, HTTP_IF_MODIFIED_SINCE=since
+                    )
+                    self.assertEqual(response.status_code, 200)
+
+    def test_evicted_stamp_is_not_older(self):
+        """Без метки в кэше Last-Modified - не раньше последней записи."""
+        since = header_date(ConditionalGetTest.past)
+        cache.delete(PAGES_MODIFIED)
+        response = self.guest_client.get(
+            self.urls[0], HTTP_IF_MODIFIED_SINCE=since
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_not_modified_until_write(self):
+        """ETag даёт 304, пока не записано ничего нового."""
+        url = reverse('posts:index')
+        etag = self.guest_client.get(url)['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(
+            post=ConditionalGetTest.post, author=ConditionalGetTest.user,
+            text='Комментарий'
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_authorized_pages_per_user(self):
+        """Пользователю - только ETag, и не совпадающий с анонимным."""
+        url = reverse('posts:index')
+        anonymous_etag = self.guest_client.get(url)['ETag']
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertNotEqual(response['ETag'], anonymous_etag)
+        response = self.authorized_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=header_date(timezone.now()),
+            HTTP_IF_NONE_MATCH=anonymous_etag,
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.authorized_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_csrf_secret_changes_etag(self):
+        """После нового входа форма с прежним CSRF-токеном не отдаётся 304."""
+        url = self.urls[3]
+        # Первый ответ ставит cookie CSRF, ETag считаем уже с ней.
+        self.authorized_client.get(url)
+        etag = self.authorized_client.get(url)['ETag']
+        self.assertEqual(
+            self.authorized_client.get(
+                url, HTTP_IF_NONE_MATCH=etag
+            ).status_code,
+            304,
+        )
+        # Вход меняет секрет CSRF (rotate_token), как и эта cookie.
+        self.authorized_client.cookies[settings.CSRF_COOKIE_NAME] = 'x' * 32
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,104 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.counters import get_user_stats
+from posts.models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        # Свежие объекты: у общих кэшируется user.stats между тестами.
+        self.user = User.objects.get(pk=CountersTest.user.pk)
+        self.author = User.objects.get(pk=CountersTest.author.pk)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_stats_created_on_first_read(self):
+        """Отсутствующие счётчики считаются по данным при чтении."""
+        stats = get_user_stats(self.author)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 0)
+
+    def test_counters_follow_writes(self):
+        """Посты, подписки и комментарии двигают счётчики."""
+        get_user_stats(self.author)
+        get_user_stats(self.user)
+        post = Post.objects.create(author=self.author, text='Ещё пост')
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='Комментарий'
+        )
+        self.assertEqual(self.stats(self.author).posts_count, 2)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.user).following_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+        comment.delete()
+        follow.delete()
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.user).following_count, 0)
+
+    def test_profile_reads_stored_counts(self):
+        """Профиль берёт счётчики из таблицы, без COUNT(*)."""
+        get_user_stats(self.author)
+        url = reverse('posts:profile', kwargs={'username': self.author})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.context['count'], 1)
+        self.assertEqual(response.context['sub_count'], 0)
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+
+    def test_recount_repairs_drift(self):
+        """recount_stats исправляет разошедшиеся счётчики."""
+        get_user_stats(self.author)
+        UserStats.objects.filter(user=self.author).update(posts_count=42)
+        Post.objects.filter(pk=CountersTest.post.pk).update(comments_count=7)
+        out = StringIO()
+        call_command('recount_stats', stdout=out)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.user).posts_count, 0)
+        CountersTest.post.refresh_from_db()
+        self.assertEqual(CountersTest.post.comments_count, 0)
+        self.assertIn('постов 1', out.getvalue())
+
+    def test_edit_keeps_concurrent_counters(self):
+        """Редактирование не затирает счётчик и флаг превью."""
+        post = CountersTest.post
+        url = reverse('posts:post_edit', kwargs={'post_id': post.pk})
+        author_client = Client()
+        author_client.force_login(self.author)
+        author_client.get(url)
+        # Пост прочитан до комментария и готовности превью, как в форме,
+        # открытой во время них.
+        stale = Post.objects.get(pk=post.pk)
+        Comment.objects.create(post=post, author=self.user, text='Первый')
+        Post.objects.filter(pk=post.pk).update(thumbnails_ready=True)
+        with mock.patch('posts.views.get_object_or_404', return_value=stale):
+            author_client.post(url, {'text': 'Исправленный пост'})
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Исправленный пост')
+        self.assertEqual(post.comments_count, 1)
+        self.assertTrue(post.thumbnails_ready)
@@ -0,0 +1,166 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.export import export_records
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def read_ndjson(response):
+    content = b''.join(response.streaming_content).decode()
+    return [json.loads(line) for line in content.splitlines()]
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author,
+                text=f'Пост {number}',
+                group=cls.group if number % 2 else None,
+            )
+            for number in range(5)
+        ]
+        cls.posts[0].image = SimpleUploadedFile(
+            'small.gif', b'GIF89a', content_type='image/gif'
+        )
+        cls.posts[0].save()
+        Post.objects.create(author=cls.reader, text='Чужой пост')
+        cls.comment = Comment.objects.create(
+            post=cls.posts[1], author=cls.reader, text='Комментарий'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_profile_export_streams_author_posts(self):
+        """Выгрузка профиля отдаёт потоком только посты автора."""
+        response = self.guest_client.get(
+            reverse('posts:profile_export', kwargs={'username': 'author'})
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="author.ndjson"'
+        )
+        records = read_ndjson(response)
+        self.assertEqual(
+            [record['id'] for record in records],
+            [post.pk for post in ExportPostsTest.posts]
+        )
+        self.assertEqual(records[1]['group'], 'test-slug')
+        self.assertNotIn('image', records[0])
+
+    def test_export_comments_and_images(self):
+        """Комментарии идут после постов, картинки - с полным адресом."""
+        response = self.guest_client.get(
+            reverse('posts:group_export', kwargs={'slug': 'test-slug'}),
+            {'comments': 1, 'images': 1},
+        )
+        records = read_ndjson(response)
+        self.assertEqual(records[-1], {
+            'type': 'comment',
+            'id': ExportPostsTest.comment.pk,
+            'post': ExportPostsTest.posts[1].pk,
+            'author': 'reader',
+            'text': 'Комментарий',
+            'created': ExportPostsTest.comment.created.isoformat(),
+        })
+        response = self.guest_client.get(
+            reverse('posts:profile_export', kwargs={'username': 'author'}),
+            {'images': 1},
+        )
+        record = read_ndjson(response)[0]
+        self.assertEqual(record['image'], 'posts/small.gif')
+        self.assertTrue(record['image_url'].startswith('http://testserver/'))
+
+    def test_export_flags_parsed(self):
+        """?comments=0 и ?images=false опции не включают."""
+        url = reverse('posts:profile_export', kwargs={'username': 'author'})
+        for value, enabled in (('0', False), ('false', False), ('', False),
+                               ('no', False), ('1', True), ('True', True),
+                               ('yes', True)):
+            with self.subTest(value=value):
+                records = read_ndjson(self.guest_client.get(
+                    url, {'comments': value, 'images': value}
+                ))
+                self.assertEqual(records[-1]['type'] == 'comment', enabled)
+                self.assertEqual('image_url' in records[0], enabled)
+
+    def test_export_csv(self):
+        """CSV выгружается с заголовком, неизвестный формат - ошибка 400."""
+        url = reverse('posts:group_export', kwargs={'slug': 'test-slug'})
+        response = self.guest_client.get(url, {'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual([row['text'] for row in rows], ['Пост 1', 'Пост 3'])
+        response = self.guest_client.get(url, {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_group_not_found(self):
+        response = self.guest_client.get(
+            reverse('posts:group_export', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_posts_read_in_keyset_chunks(self):
+        """Посты читаются пачками по pk, по запросу на пачку."""
+        with CaptureQueriesContext(connection) as queries:
+            records = list(export_records(
+                ExportPostsTest.author.posts.all(), chunk_size=2
+            ))
+        self.assertEqual(len(records), 5)
+        # Три полные или неполные пачки и пустая в конце.
+        self.assertEqual(len(queries), 4)
+        self.assertIn('"posts_post"."id" >', queries[1]['sql'])
+
+    def test_command_round_trip_with_import(self):
+        """Выгрузка команды загружается обратно через import_posts."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'author.ndjson')
+        call_command('export_posts', author='author', comments=True,
+                     output=path)
+        Post.objects.filter(author=ExportPostsTest.author).delete()
+        call_command('import_posts', path, stdout=StringIO(),
+                     stderr=StringIO())
+        self.assertEqual(ExportPostsTest.author.posts.count(), 5)
+        post = Post.objects.get(text='Пост 1')
+        self.assertEqual(post.group, ExportPostsTest.group)
+        self.assertEqual(post.comments.get().text, 'Комментарий')
+
+    def test_command_unknown_author(self):
+        with self.assertRaises(CommandError):
+            call_command('export_posts', author='nobody', stdout=StringIO())
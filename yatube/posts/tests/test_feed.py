@@ -0,0 +1,108 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+class FeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text='Старый пост',
+        )
+        Post.objects.create(author=cls.other, text='Чужой пост')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FeedTest.user)
+
+    def get_feed(self, **params):
+        response = self.authorized_client.get(
+            reverse('posts:follow_index'), params
+        )
+        return response.context['page_obj']
+
+    def follow(self):
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': FeedTest.author}
+        ))
+        return Follow.objects.get(user=FeedTest.user, author=FeedTest.author)
+
+    def test_new_follow_visible_before_backfill(self):
+        """Посты автора видны в ленте сразу после подписки."""
+        follow = self.follow()
+        self.assertFalse(follow.in_feed)
+        self.assertEqual(list(self.get_feed()), [FeedTest.old_post])
+
+    def test_backfill_materializes_feed(self):
+        """Бэкфилл раскладывает старые посты, новые приходят fan-out."""
+        follow = self.follow()
+        call_command('backfill_feeds', stdout=StringIO())
+        follow.refresh_from_db()
+        self.assertTrue(follow.in_feed)
+        new_post = Post.objects.create(author=FeedTest.author, text='Новый')
+        self.assertEqual(
+            list(FeedEntry.objects.filter(user=FeedTest.user)
+                 .values_list('post_id', flat=True)),
+            [new_post.pk, FeedTest.old_post.pk]
+        )
+        self.assertEqual(list(self.get_feed()),
+                         [new_post, FeedTest.old_post])
+
+    def test_unfollow_removes_entries(self):
+        """Отписка чистит материализованную ленту."""
+        self.follow()
+        call_command('backfill_feeds', stdout=StringIO())
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': FeedTest.author}
+        ))
+        self.assertFalse(FeedEntry.objects.filter(user=FeedTest.user))
+        self.assertEqual(list(self.get_feed()), [])
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_popular_author_is_pulled(self):
+        """Посты популярного автора не раскладываются, а дочитываются."""
+        follow = self.follow()
+        call_command('backfill_feeds', stdout=StringIO())
+        follow.refresh_from_db()
+        self.assertFalse(follow.in_feed)
+        new_post = Post.objects.create(author=FeedTest.author, text='Новый')
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(list(self.get_feed()),
+                         [new_post, FeedTest.old_post])
+
+    @override_settings(PER_PAGE=2)
+    def test_merged_feed_pages(self):
+        """Материализованная и прямая части ленты листаются вместе."""
+        self.follow()
+        call_command('backfill_feeds', stdout=StringIO())
+        Follow.objects.create(user=FeedTest.user, author=FeedTest.other)
+        for i in range(3):
+            Post.objects.create(author=FeedTest.author, text=f'Пост {i}')
+            Post.objects.create(author=FeedTest.other, text=f'Пост {i}')
+        expected = list(Post.objects.filter(
+            author__following__user=FeedTest.user
+        ).order_by('-pub_date', '-pk'))
+        first = self.get_feed()
+        second = self.get_feed(after=first.next_cursor)
+        third = self.get_feed(after=second.next_cursor)
+        self.assertEqual(list(first) + list(second) + list(third),
+                         expected[:6])
+        rest = self.get_feed(after=third.next_cursor)
+        self.assertEqual(list(rest), expected[6:])
+        self.assertFalse(rest.has_next())
+        newer = self.get_feed(before=second.previous_cursor)
+        self.assertEqual(list(newer), list(first))
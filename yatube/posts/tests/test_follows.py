@@ -0,0 +1,187 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.follows import get_follow_graph, get_pulled_author_ids
+from posts.models import Follow
+
+User = get_user_model()
+# Подписки пользователя; подзапросы пересчёта счётчиков сюда не входят.
+FOLLOW_SQL = '"posts_follow"."user_id"'
+
+
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FollowGraphTest.user)
+        self.profile_url = reverse(
+            'posts:profile', kwargs={'username': 'author'}
+        )
+
+    def get_profile(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(self.profile_url)
+        follow_queries = [
+            query for query in queries.captured_queries
+            if FOLLOW_SQL in query['sql']
+        ]
+        return response.content.decode(), follow_queries
+
+    def test_button_from_cache(self):
+        """Кнопка подписки на профиле не стоит запросов к Follow."""
+        content, follow_queries = self.get_profile()
+        self.assertIn('Подписаться', content)
+        self.assertEqual(len(follow_queries), 1)
+        content, follow_queries = self.get_profile()
+        self.assertIn('Подписаться', content)
+        self.assertEqual(follow_queries, [])
+
+    def test_follow_and_unfollow_invalidate(self):
+        self.get_profile()
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        self.assertIn('Отписаться', self.get_profile()[0])
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertIn('Подписаться', self.get_profile()[0])
+        self.assertFalse(Follow.objects.exists())
+
+    def test_unfollow_with_stale_cache(self):
+        """Отписка срабатывает, даже если кэш подписок отстал."""
+        self.get_profile()
+        # Подписка в обход сигналов: в кэше её нет.
+        Follow.objects.bulk_create([Follow(
+            user=FollowGraphTest.user, author=FollowGraphTest.author
+        )])
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertFalse(Follow.objects.exists())
+
+    def test_follow_after_stale_unfollow(self):
+        """Кэш, ошибочно считающий подписку, не мешает подписаться."""
+        cache.set(f'following:{FollowGraphTest.user.pk}',
+                  {FollowGraphTest.author.pk: False}, None)
+        for name in ('posts:profile_unfollow', 'posts:profile_follow'):
+            self.authorized_client.get(
+                reverse(name, kwargs={'username': 'author'})
+            )
+        self.assertTrue(Follow.objects.filter(
+            user=FollowGraphTest.user, author=FollowGraphTest.author
+        ).exists())
+
+    def test_repeated_follow(self):
+        """Повторная подписка не создаёт второй записи."""
+        url = reverse('posts:profile_follow', kwargs={'username': 'author'})
+        self.authorized_client.get(url)
+        response = self.authorized_client.get(url)
+        self.assertRedirects(response, self.profile_url)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_backfill_updates_pulled_authors(self):
+        """Бэкфилл ленты убирает автора из дочитываемых напрямую."""
+        Follow.objects.create(
+            user=FollowGraphTest.user, author=FollowGraphTest.author
+        )
+        self.assertEqual(
+            get_pulled_author_ids(User.objects.get(username='reader')),
+            [FollowGraphTest.author.pk],
+        )
+        call_command('backfill_feeds', stdout=StringIO())
+        self.assertEqual(
+            get_pulled_author_ids(User.objects.get(username='reader')), []
+        )
+
+    def test_import_invalidates(self):
+        reader = User.objects.get(username='reader')
+        self.assertEqual(get_follow_graph(reader), {})
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'follows.ndjson')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(
+                '{"type": "follow", "user": "reader", "author": "author"}\n'
+            )
+        call_command('import_posts', path, stdout=StringIO(),
+                     stderr=StringIO())
+        self.assertIn(
+            FollowGraphTest.author.pk,
+            get_follow_graph(User.objects.get(username='reader')),
+        )
+
+    def test_anonymous_has_no_follows(self):
+        response = Client().get(self.profile_url)
+        self.assertNotIn('Отписаться', response.content.decode())
+
+
+@override_settings(FOLLOWS_PER_PAGE=2)
+class FollowListTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(3)
+        ]
+        for reader in cls.readers:
+            Follow.objects.create(user=reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.url = reverse('posts:followers', kwargs={'username': 'author'})
+
+    def usernames(self, response):
+        return [person.username for person in response.context['people']]
+
+    def test_keyset_pages(self):
+        """Список листается курсором, пользователь берётся тем же JOIN."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(self.url)
+        self.assertEqual(self.usernames(response), ['reader0', 'reader1'])
+        self.assertEqual(len(queries), 2)
+        self.assertIn('INNER JOIN "auth_user"', queries[-1]['sql'])
+        response = self.guest_client.get(
+            self.url, {'after': response.context['next_cursor']}
+        )
+        self.assertEqual(self.usernames(response), ['reader2'])
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_following_list(self):
+        response = self.guest_client.get(
+            reverse('posts:following', kwargs={'username': 'reader0'})
+        )
+        self.assertEqual(self.usernames(response), ['author'])
+
+    def test_first_page_cached_until_follow(self):
+        self.guest_client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(self.url)
+        self.assertEqual(len(queries), 1)
+        Follow.objects.filter(user=FollowListTest.readers[0]).delete()
+        response = self.guest_client.get(self.url)
+        self.assertEqual(self.usernames(response), ['reader1', 'reader2'])
+
+    def test_missing_user(self):
+        response = self.guest_client.get(
+            reverse('posts:followers', kwargs={'username': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
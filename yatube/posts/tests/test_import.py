@@ -0,0 +1,192 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.importer import LookupCache, PostImporter, read_records
+from posts.models import (Comment, FeedEntry, Follow, Group, ImportCheckpoint,
+                          Post)
+
+User = get_user_model()
+RECORDS = [
+    {'id': 1, 'author': 'author', 'group': 'test-slug',
+     'text': 'Первый пост', 'pub_date': '2020-01-01T10:00:00'},
+    {'id': 2, 'author': 'author', 'text': 'Второй пост',
+     'pub_date': '2020-01-02T10:00:00+03:00'},
+    {'type': 'comment', 'post': 1, 'author': 'reader',
+     'text': 'Комментарий', 'created': '2020-01-03T10:00:00'},
+    {'type': 'follow', 'user': 'reader', 'author': 'author'},
+    {'id': 3, 'author': 'stranger', 'text': 'Пост незнакомца'},
+]
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def write_ndjson(self, records, name='posts.ndjson'):
+        return self.write(name, '\n'.join(
+            json.dumps(record, ensure_ascii=False) for record in records
+        ))
+
+    def import_posts(self, path, **options):
+        out = StringIO()
+        call_command('import_posts', path, stdout=out, stderr=StringIO(),
+                     **options)
+        return out.getvalue()
+
+    def test_import_ndjson(self):
+        """NDJSON загружается с датами, группами, комментариями, счётчиками."""
+        output = self.import_posts(
+            self.write_ndjson(RECORDS), batch=2, create_users=True
+        )
+        self.assertIn('Постов: 3, комментариев: 1, подписок: 1', output)
+        post = Post.objects.get(text='Первый пост')
+        self.assertEqual(post.group, ImportPostsTest.group)
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.comments.get().author, ImportPostsTest.reader)
+        self.assertTrue(Follow.objects.filter(
+            user=ImportPostsTest.reader, author=ImportPostsTest.author
+        ).exists())
+        self.assertEqual(ImportPostsTest.author.stats.posts_count, 2)
+        self.assertTrue(User.objects.filter(username='stranger').exists())
+
+    def test_unknown_author_rejected(self):
+        """Без --create-users запись с неизвестным автором отклоняется."""
+        output = self.import_posts(self.write_ndjson(RECORDS))
+        self.assertIn('ошибок: 1', output)
+        self.assertFalse(Post.objects.filter(text='Пост незнакомца').exists())
+
+    def test_import_csv(self):
+        """CSV читается по заголовку, пустые ячейки не мешают."""
+        path = self.write('posts.csv', (
+            'type,id,author,group,text,pub_date\n'
+            'post,10,author,test-slug,Пост из CSV,2021-05-01T12:00:00\n'
+            'post,11,author,,Пост без группы,\n'
+        ))
+        self.import_posts(path)
+        self.assertEqual(
+            Post.objects.get(text='Пост из CSV').group,
+            ImportPostsTest.group
+        )
+        self.assertIsNone(Post.objects.get(text='Пост без группы').group)
+
+    def test_resume_from_checkpoint(self):
+        """После сбоя импорт продолжается с первой незагруженной записи."""
+        path = self.write_ndjson(RECORDS[:2] + [{'author': 'author'}] * 3)
+        with self.assertRaises(CommandError):
+            self.import_posts(path, batch=2, max_errors=0)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get().position, 2)
+
+        path = self.write_ndjson(RECORDS[:2] + [
+            {'author': 'author', 'text': f'Пост {i}'} for i in range(3)
+        ])
+        self.import_posts(path, batch=2)
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(ImportCheckpoint.objects.get().position, 5)
+
+    def test_restart_skips_imported_posts(self):
+        """Повторный импорт с --restart не дублирует посты с id."""
+        path = self.write_ndjson(RECORDS[:2])
+        self.import_posts(path)
+        output = self.import_posts(path, restart=True)
+        self.assertIn('повторов: 2', output)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def feed_texts(self):
+        client = Client()
+        client.force_login(ImportPostsTest.reader)
+        response = client.get(reverse('posts:follow_index'))
+        return [post.text for post in response.context['page_obj']]
+
+    def test_imported_posts_reach_feeds(self):
+        """Импортированный пост попадает в материализованную ленту."""
+        Follow.objects.create(
+            user=ImportPostsTest.reader, author=ImportPostsTest.author,
+            in_feed=True,
+        )
+        PostImporter('test').run(
+            [{'author': 'author', 'text': 'Импортированный пост'}]
+        )
+        self.assertTrue(FeedEntry.objects.filter(
+            user=ImportPostsTest.reader, post__text='Импортированный пост'
+        ).exists())
+        self.assertEqual(self.feed_texts(), ['Импортированный пост'])
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_imported_posts_of_popular_author_pulled(self):
+        """Посты популярного автора лента дочитывает напрямую."""
+        follow = Follow.objects.create(
+            user=ImportPostsTest.reader, author=ImportPostsTest.author,
+            in_feed=True,
+        )
+        PostImporter('test').run(
+            [{'author': 'author', 'text': 'Импортированный пост'}]
+        )
+        follow.refresh_from_db()
+        self.assertFalse(follow.in_feed)
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed_texts(), ['Импортированный пост'])
+
+    def test_streaming_batches(self):
+        """Записи читаются лениво и вставляются пачками по batch_size."""
+        importer = PostImporter('test', batch_size=10)
+        records = ({'author': 'author', 'text': f'Пост {i}'}
+                   for i in range(25))
+        with CaptureQueriesContext(connection) as queries:
+            importer.run(records)
+        inserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT INTO "posts_post"')
+        ]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(Post.objects.count(), 25)
+
+    def test_lookup_cache_is_bounded(self):
+        """Кэш авторов не растёт больше заданного размера."""
+        cache = LookupCache(User, 'username', size=1)
+        self.assertEqual(
+            cache.resolve({'author', 'reader', 'nobody'}),
+            {'author': ImportPostsTest.author.pk,
+             'reader': ImportPostsTest.reader.pk}
+        )
+        self.assertEqual(len(cache.ids), 1)
+
+    def test_read_records_from_stream(self):
+        """NDJSON читается построчно, пустые строки пропускаются."""
+        stream = StringIO('{"text": "a"}\n\n{"text": "b"}\n')
+        self.assertEqual(
+            [record['text'] for record in read_records(stream)], ['a', 'b']
+        )
+        self.assertEqual(Comment.objects.count(), 0)
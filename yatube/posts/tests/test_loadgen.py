@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.signals import got_request_exception
+from django.db import OperationalError
+from django.test import TestCase
+
+from core.loadgen import (Workload, call, parse_mix, run_load,
+                          summarize)
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+def locked_application(environ, start_response):
+    """WSGI-приложение, у которого база всегда заблокирована."""
+    try:
+        raise OperationalError('database is locked')
+    except OperationalError:
+        got_request_exception.send(sender=None)
+    start_response('500 Internal Server Error', [])
+    return [b'']
+
+
+class LoadGeneratorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(5):
+            Post.objects.create(author=cls.user, text=f'Пост {i}')
+
+    def test_parse_mix(self):
+        """Смесь разбирается из строки, неизвестные действия отклоняются."""
+        self.assertEqual(
+            parse_mix('index=3, add_comment=1'),
+            {'index': 3.0, 'add_comment': 1.0}
+        )
+        with self.assertRaises(ValueError):
+            parse_mix('drop_table=1')
+
+    def test_mixed_workload_reads_and_writes(self):
+        """Нагрузка выполняет чтения и записи без ошибок."""
+        from yatube.wsgi import application
+
+        samples = run_load(
+            application, Workload(), {'index': 1, 'add_comment': 1},
+            duration=0.3,
+        )
+        report = summarize(samples, 0.3)
+        self.assertEqual(report['errors'], {})
+        self.assertEqual(report['actions']['index']['statuses'], {
+            '200': report['actions']['index']['requests']
+        })
+        self.assertEqual(
+            Comment.objects.count(),
+            report['actions']['add_comment']['statuses']['302']
+        )
+        self.assertTrue(report['timeline'])
+
+    def test_locked_database_reported(self):
+        """Ошибка «database is locked» попадает в отчёт по видам."""
+        status, error = call(locked_application, {})
+        self.assertEqual(status, 500)
+        self.assertEqual(error, 'OperationalError: database is locked')
+        samples = [
+            (0.1, 'index', 5.0, 200, ''),
+            (0.2, 'add_comment', 40.0, 500, error),
+            (1.5, 'add_comment', 20.0, 302, ''),
+        ]
+        report = summarize(samples, 2)
+        self.assertEqual(report['errors'], {error: 1})
+        self.assertEqual(report['actions']['add_comment']['error_rate'], 0.5)
+        self.assertEqual(
+            [row['errors'] for row in report['timeline']], [1, 0]
+        )
+        self.assertEqual(report['timeline'][0]['histogram'],
+                         {'<10': 1, '<50': 1})
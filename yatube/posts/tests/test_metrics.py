@@ -0,0 +1,191 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails
+
+User = get_user_model()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.metrics_dir = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.metrics_dir, ignore_errors=True)
+        settings_override = override_settings(
+            METRICS=True,
+            METRICS_DIR=self.metrics_dir,
+            METRICS_FLUSH_INTERVAL=0,
+            METRICS_TOKEN='secret',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+        self.guest_client = Client()
+
+    def scrape(self):
+        response = self.guest_client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Type'],
+            'text/plain; version=0.0.4; charset=utf-8',
+        )
+        return response.content.decode()
+
+    def write_process_file(self, name, count):
+        path = os.path.join(self.metrics_dir, name)
+        with open(path, 'w') as file:
+            json.dump({
+                'counters': [
+                    ['yatube_responses_total',
+                     {'view': 'posts:index', 'status': 200}, count],
+                ],
+                'histograms': [],
+            }, file)
+        return path
+
+    def test_request_metrics(self):
+        """Запросы дают гистограммы времени и SQL, коды ответов и кэш."""
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get('/missing-page/')
+        content = self.scrape()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            content,
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"} 2',
+            content,
+        )
+        self.assertIn(
+            'yatube_responses_total{status="200",view="posts:index"} 2',
+            content,
+        )
+        self.assertIn(
+            'yatube_responses_total{status="404",view="unresolved"} 1',
+            content,
+        )
+        self.assertIn('yatube_db_queries_count{view="posts:index"} 2',
+                      content)
+        self.assertIn('yatube_cache_requests_total{result="hit"}', content)
+        self.assertIn('yatube_cache_hit_ratio 0.', content)
+
+    def test_processes_summed(self):
+        """Файлы других процессов складываются с файлом текущего."""
+        self.guest_client.get(reverse('posts:index'))
+        # pid 1 существует всегда: файл живого процесса.
+        self.write_process_file('1-other.json', 5)
+        self.assertIn(
+            'yatube_responses_total{status="200",view="posts:index"} 6',
+            self.scrape(),
+        )
+
+    def test_dead_processes_archived(self):
+        """Файл убитого процесса уходит в архив, сумма не уменьшается."""
+        self.guest_client.get(reverse('posts:index'))
+        # Такого pid не бывает: процесс считается завершившимся.
+        path = self.write_process_file('999999999-dead.json', 5)
+        for _ in range(2):
+            self.assertIn(
+                'yatube_responses_total{status="200",view="posts:index"} 6',
+                self.scrape(),
+            )
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(
+            os.path.exists(os.path.join(self.metrics_dir, metrics.ARCHIVE))
+        )
+
+    def test_exit_archives_own_file(self):
+        """При выходе процесс переносит свой файл в архив."""
+        metrics.inc('yatube_responses_total', view='x', status=200)
+        metrics.registry.close()
+        self.assertEqual(
+            os.listdir(self.metrics_dir).count(metrics.registry.name), 0
+        )
+        metrics.inc('yatube_responses_total', view='x', status=200)
+        counters, _ = metrics.collect()
+        self.assertEqual(
+            counters[('yatube_responses_total',
+                      (('status', 200), ('view', 'x')))],
+            2,
+        )
+
+    def test_fork_starts_from_zero(self):
+        metrics.inc('yatube_responses_total', view='x', status=200)
+        name = metrics.registry.name
+        metrics.registry.pid = -1
+        self.assertEqual(metrics.registry.snapshot()['counters'], [])
+        self.assertNotEqual(metrics.registry.name, name)
+
+    def test_thumbnail_duration(self):
+        media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with self.settings(MEDIA_ROOT=media_root):
+            post = Post.objects.create(
+                author=MetricsTest.user,
+                text='Пост с картинкой',
+                image=SimpleUploadedFile(
+                    name='small.gif', content=SMALL_GIF,
+                    content_type='image/gif'
+                ),
+            )
+            generate_thumbnails(post)
+        self.assertIn(
+            'yatube_thumbnail_duration_seconds_count{geometry="960x339"} 1',
+            self.scrape(),
+        )
+
+    def test_other_address_forbidden(self):
+        response = self.guest_client.get(
+            reverse('metrics'), REMOTE_ADDR='10.0.0.1',
+            HTTP_AUTHORIZATION='Bearer secret',
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_token_required(self):
+        """С локального адреса (как за прокси) без токена - 403."""
+        for authorization in ('', 'Bearer wrong', 'secret'):
+            with self.subTest(authorization=authorization):
+                response = self.guest_client.get(
+                    reverse('metrics'), HTTP_AUTHORIZATION=authorization
+                )
+                self.assertEqual(response.status_code, 403)
+        with self.settings(METRICS_TOKEN=''):
+            response = self.guest_client.get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer '
+            )
+        self.assertEqual(response.status_code, 403)
+
+    def test_disabled(self):
+        with self.settings(METRICS=False):
+            response = Client().get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
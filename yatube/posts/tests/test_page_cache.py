@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(AnonymousPageCacheTest.user)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        )
+
+    def test_anonymous_pages_cached(self):
+        """Повторный анонимный запрос отдаётся из кэша без шаблона."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertIsNotNone(self.guest_client.get(url).context)
+                response = self.guest_client.get(url)
+                self.assertIsNone(response.context)
+                self.assertContains(response, 'Тестовый пост')
+
+    def test_authorized_pages_not_cached(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.authorized_client.get(url)
+                response = self.authorized_client.get(url)
+                self.assertIsNotNone(response.context)
+
+    def test_writes_bump_generation(self):
+        """Записи постов, комментариев и подписок сбрасывают кэш."""
+        user = AnonymousPageCacheTest.user
+        post = AnonymousPageCacheTest.post
+        reader = User.objects.create_user(username='reader')
+        writes = (
+            lambda: Post.objects.create(author=user, text='Новый пост'),
+            lambda: Comment.objects.create(
+                post=post, author=user, text='Комментарий'
+            ),
+            lambda: Follow.objects.create(user=reader, author=user),
+        )
+        for write in writes:
+            for url in self.urls:
+                self.guest_client.get(url)
+            write()
+            for url in self.urls:
+                with self.subTest(url=url):
+                    response = self.guest_client.get(url)
+                    self.assertIsNotNone(response.context)
+
+    def test_new_post_visible_immediately(self):
+        self.guest_client.get(self.urls[0])
+        Post.objects.create(
+            author=AnonymousPageCacheTest.user, text='Свежий пост'
+        )
+        self.assertContains(self.guest_client.get(self.urls[0]), 'Свежий пост')
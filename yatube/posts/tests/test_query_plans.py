@@ -0,0 +1,67 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from core.query_plans import capture_view_queries, explain, plan_problems
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(15):
+            cls.post = Post.objects.create(
+                author=cls.author,
+                text=f'Тестовый пост {i}',
+                group=cls.group if i % 2 else None,
+            )
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент и поста идут по индексам без сортировки."""
+        paths = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail',
+                    kwargs={'post_id': QueryPlanTest.post.pk}),
+            reverse('posts:follow_index'),
+            reverse('posts:followers', kwargs={'username': 'author'}),
+            reverse('posts:following', kwargs={'username': 'auth'}),
+        )
+        for path in paths:
+            for sql in capture_view_queries(path, QueryPlanTest.user):
+                with self.subTest(path=path, sql=sql):
+                    self.assertEqual(plan_problems(explain(sql)), [])
+
+    def test_problems_detected(self):
+        """Полный просмотр и временное B-дерево попадают в отчёт."""
+        problems = plan_problems(
+            explain('SELECT * FROM posts_post ORDER BY text')
+        )
+        self.assertEqual(len(problems), 2)
+
+    def test_explain_views_command(self):
+        """explain_views печатает планы всех страниц чтения."""
+        out = StringIO()
+        call_command('explain_views', username='auth', stdout=out)
+        for name in ('index', 'group_list', 'profile', 'post_detail',
+                     'search', 'follow_index'):
+            self.assertIn(f'{name}: ', out.getvalue())
+        self.assertIn('Найдено проблем:', out.getvalue())
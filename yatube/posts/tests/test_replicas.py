@@ -0,0 +1,177 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection, connections, router
+from django.http import HttpResponse
+from django.test import (
+    Client, RequestFactory, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.page_cache import PAGES_MODIFIED
+from core.replicas import PIN_COOKIE, ReplicaMiddleware, read_primary
+from posts.cards import get_cards
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=('replica1',), REPLICA_PIN_SECONDS=10)
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def route(self, request, write=False):
+        """Куда ушло бы чтение внутри запроса и ответ middleware."""
+        routed = {}
+
+        def view(request):
+            if write:
+                router.db_for_write(Post)
+            routed['read'] = router.db_for_read(Post)
+            return HttpResponse()
+
+        response = ReplicaMiddleware(view)(request)
+        return routed['read'], response
+
+    def test_reads_go_to_replica(self):
+        read, response = self.route(self.factory.get('/'))
+        self.assertEqual(read, 'replica1')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_pins_request_and_user(self):
+        """После записи чтения идут в default, пока действует cookie."""
+        read, response = self.route(self.factory.post('/'), write=True)
+        self.assertEqual(read, 'default')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 10)
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        self.assertEqual(self.route(request)[0], 'default')
+
+    def test_read_primary(self):
+        """Чтения для общего кэша идут в default и внутри запроса."""
+        def view(request):
+            with read_primary():
+                routed.append(router.db_for_read(Post))
+            routed.append(router.db_for_read(Post))
+            return HttpResponse()
+
+        routed = []
+        ReplicaMiddleware(view)(self.factory.get('/'))
+        self.assertEqual(routed, ['default', 'replica1'])
+
+    def test_expired_or_broken_cookie_ignored(self):
+        for value in (str(time.time() - 1), 'garbage'):
+            with self.subTest(value=value):
+                request = self.factory.get('/')
+                request.COOKIES[PIN_COOKIE] = value
+                self.assertEqual(self.route(request)[0], 'replica1')
+
+    def test_outside_requests_use_default(self):
+        """Команды и воркер очереди читают из основной базы."""
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_replicas_not_migrated(self):
+        self.assertFalse(router.allow_migrate('replica1', 'posts'))
+        self.assertTrue(router.allow_migrate('default', 'posts'))
+
+    @override_settings(DATABASE_REPLICAS=())
+    def test_disabled_without_replicas(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaMiddleware(lambda request: HttpResponse())
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+
+class SqliteCopyReplicaTest(TransactionTestCase):
+    """Копия файла SQLite ведёт себя как отстающая реплика."""
+
+    def setUp(self):
+        cache.clear()
+        # Копируется зафиксированная база: отсюда TransactionTestCase.
+        self.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=self.user, text='Старый пост')
+        # Сессия нужна и в копии: её читают с реплики.
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        name = os.path.join(directory, 'replica.sqlite3')
+        connection.ensure_connection()
+        target = sqlite3.connect(name)
+        connection.connection.backup(target)
+        target.close()
+        connections.databases['replica1'] = {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': name,
+        }
+        self.addCleanup(connections.databases.pop, 'replica1')
+        self.addCleanup(connections.__delitem__, 'replica1')
+        self.addCleanup(lambda: connections['replica1'].close())
+
+    @override_settings(DATABASE_REPLICAS=('replica1',))
+    def test_reads_see_copy_until_own_write(self):
+        Post.objects.create(author=self.user,
+                            text='Новый пост')
+        counts = []
+
+        def view(request):
+            counts.append(Post.objects.count())
+            Post.objects.create(author=self.user,
+                                text='Ещё пост')
+            counts.append(Post.objects.count())
+            return HttpResponse()
+
+        ReplicaMiddleware(view)(RequestFactory().post('/'))
+        self.assertEqual(counts, [1, 3])
+
+    @override_settings(DATABASE_REPLICAS=('replica1',))
+    def test_shared_caches_filled_from_primary(self):
+        """После записи анонимный GET не кэширует страницу реплики."""
+        Post.objects.create(author=self.user, text='Новый пост')
+        guest_client = Client()
+        for _ in range(2):
+            response = guest_client.get(reverse('posts:index'))
+            self.assertContains(response, 'Новый пост')
+            self.assertTrue(response.has_header('ETag'))
+
+    @override_settings(DATABASE_REPLICAS=('replica1',))
+    def test_pages_read_from_replica(self):
+        """Страницы без закрепления читаются с реплики.
+
+        Пока реплика может отставать, ответ уходит без валидаторов.
+        """
+        Post.objects.create(author=self.user, text='Новый пост')
+        for client, url in (
+            (self.authorized_client, reverse('posts:index')),
+            (Client(), reverse('api:index')),
+        ):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connections['replica1']) as ctx:
+                    response = client.get(url)
+                self.assertGreater(len(ctx.captured_queries), 0)
+                self.assertNotContains(response, 'Новый пост')
+                self.assertFalse(response.has_header('ETag'))
+                self.assertFalse(response.has_header('Last-Modified'))
+        cache.set(PAGES_MODIFIED,
+                  timezone.now() - timedelta(minutes=1), None)
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertTrue(response.has_header('ETag'))
+
+    @override_settings(DATABASE_REPLICAS=('replica1',))
+    def test_replica_cards_not_cached(self):
+        post = Post.objects.get()
+        post.text = 'Исправленный пост'
+        post.save()
+        stale = get_cards(Post.objects.using('replica1'))
+        self.assertIn('Старый пост', stale[0][1])
+        fresh = get_cards(Post.objects.all())
+        self.assertIn('Исправленный пост', fresh[0][1])
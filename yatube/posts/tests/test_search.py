@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.search import build_match, search_posts
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Кошки',
+            slug='cats',
+            description='Тестовое описание',
+        )
+        cls.cat_post = Post.objects.create(
+            author=cls.user, text='Рыжий кот спит на подоконнике'
+        )
+        cls.group_post = Post.objects.create(
+            author=cls.user, text='Фотография без подписи', group=cls.group
+        )
+        cls.dog_post = Post.objects.create(
+            author=cls.user, text='Собака лает, кот убегает, кот прячется'
+        )
+
+    def search(self, query):
+        return list(search_posts(query))
+
+    def test_build_match_escapes_input(self):
+        """Операторы FTS5 из запроса не попадают в MATCH."""
+        self.assertEqual(
+            build_match('кот OR "собака*'), '"кот"* "or"* "собака"*'
+        )
+        self.assertEqual(build_match(' -() '), '')
+
+    def test_search_ranks_results(self):
+        """Пост с большим числом совпадений идёт первым."""
+        self.assertEqual(
+            self.search('кот'),
+            [SearchTest.dog_post, SearchTest.cat_post]
+        )
+        self.assertEqual(self.search('рыж'), [SearchTest.cat_post])
+
+    def test_search_by_group_title(self):
+        """Пост находится по названию своей группы."""
+        self.assertEqual(self.search('кошки'), [SearchTest.group_post])
+
+    def test_index_follows_writes(self):
+        """Индекс обновляется при правке, смене группы и удалении."""
+        post = Post.objects.create(author=SearchTest.user, text='Попугай')
+        self.assertEqual(self.search('попугай'), [post])
+        post.text = 'Хомяк'
+        post.save()
+        self.assertEqual(self.search('попугай'), [])
+        self.assertEqual(self.search('хомяк'), [post])
+
+        Group.objects.filter(pk=SearchTest.group.pk).update(title='Звери')
+        self.assertEqual(self.search('звери'), [SearchTest.group_post])
+        Post.objects.filter(pk=post.pk).update(group=SearchTest.group)
+        self.assertEqual(self.search('звери хомяк'), [post])
+
+        post.delete()
+        self.assertEqual(self.search('хомяк'), [])
+
+    def test_search_view_paginates(self):
+        """Страница поиска показывает найденные посты постранично."""
+        Post.objects.bulk_create(
+            Post(author=SearchTest.user, text=f'Попугай номер {i}')
+            for i in range(13)
+        )
+        url = reverse('posts:search')
+        response = Client().get(url, {'q': 'попугай'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 13)
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertContains(response, '?q=%D0%BF')
+        response = Client().get(url, {'q': 'попугай', 'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_empty_query_finds_nothing(self):
+        """Пустой запрос не возвращает постов."""
+        response = Client().get(reverse('posts:search'), {'q': '  '})
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_admin_uses_index(self):
+        """Поиск в админке идёт по полнотекстовому индексу."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кошки'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list),
+            [SearchTest.group_post]
+        )
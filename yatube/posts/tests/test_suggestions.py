@@ -0,0 +1,144 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post, Suggestion, UserStats
+from posts.suggestions import rebuild_all, rebuild_stale
+
+User = get_user_model()
+
+
+class SuggestionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('reader', 'friend', 'second', 'popular', 'writer',
+                         'neighbour')
+        }
+        users = cls.users
+        # reader -> friend, second; оба подписаны на popular, friend ещё
+        # и на writer. neighbour комментирует пост writer вместе с reader.
+        for user, author in (('reader', 'friend'), ('reader', 'second'),
+                             ('friend', 'popular'), ('second', 'popular'),
+                             ('friend', 'writer'), ('friend', 'reader')):
+            Follow.objects.create(user=users[user], author=users[author])
+        post = Post.objects.create(author=users['writer'], text='Пост')
+        for name in ('reader', 'neighbour'):
+            Comment.objects.create(post=post, author=users[name], text='!')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(SuggestionsTest.users['reader'])
+
+    def suggested(self, name):
+        return dict(
+            Suggestion.objects.filter(user__username=name)
+            .values_list('author__username', 'score')
+        )
+
+    def test_friends_of_friends_and_comments(self):
+        """Веса складываются из подписок друзей и общих комментариев."""
+        rebuild_all()
+        self.assertEqual(self.suggested('reader'), {
+            'popular': 2.0,
+            'writer': 1.5,
+            'neighbour': 0.5,
+        })
+        self.assertEqual(
+            list(Suggestion.objects.filter(user__username='reader')
+                 .values_list('author__username', flat=True)),
+            ['popular', 'writer', 'neighbour'],
+        )
+
+    @override_settings(SUGGESTIONS_TOP_K=1)
+    def test_top_k(self):
+        rebuild_all()
+        self.assertEqual(self.suggested('reader'), {'popular': 2.0})
+
+    def test_only_changed_users_rebuilt(self):
+        """Обычный запуск пересчитывает только тех, чьи подписки менялись."""
+        rebuild_all()
+        self.assertEqual(rebuild_stale(), (0, 0))
+        users = SuggestionsTest.users
+        Follow.objects.create(user=users['reader'], author=users['popular'])
+        self.assertTrue(
+            UserStats.objects.get(user=users['reader']).suggestions_stale
+        )
+        users_count, _ = rebuild_stale()
+        self.assertEqual(users_count, 1)
+        self.assertNotIn('popular', self.suggested('reader'))
+        self.assertFalse(UserStats.objects.filter(
+            suggestions_stale=True
+        ).exists())
+
+    def test_users_without_stats_are_stale(self):
+        users_count, _ = rebuild_stale()
+        self.assertEqual(users_count, len(SuggestionsTest.users))
+        self.assertIn('popular', self.suggested('reader'))
+
+    def test_queries_do_not_grow_with_users(self):
+        """Пачка пользователей считается постоянным числом запросов."""
+        with CaptureQueriesContext(connection) as queries:
+            rebuild_all()
+        few = len(queries)
+        for number in range(20):
+            user = User.objects.create_user(username=f'extra{number}')
+            Follow.objects.create(user=user, author=SuggestionsTest.users[
+                'friend'
+            ])
+        with CaptureQueriesContext(connection) as queries:
+            rebuild_all()
+        self.assertEqual(len(queries), few)
+
+    def test_shown_on_profile_and_follow_index(self):
+        """Блок виден на страницах и сразу забывает выбранного автора."""
+        rebuild_all()
+        urls = (
+            reverse('posts:follow_index'),
+            reverse('posts:profile', kwargs={'username': 'friend'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                self.assertEqual(
+                    [author.username
+                     for author in response.context['suggestions']],
+                    ['popular', 'writer', 'neighbour'],
+                )
+                self.assertContains(response, 'Кого почитать')
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'popular'})
+        )
+        response = self.reader_client.get(urls[0])
+        self.assertEqual(
+            [author.username for author in response.context['suggestions']],
+            ['writer', 'neighbour'],
+        )
+
+    def test_rebuild_changes_profile_etag(self):
+        """После пересчёта профиль не отвечает 304 со старым блоком."""
+        url = reverse('posts:profile', kwargs={'username': 'friend'})
+        etag = self.reader_client.get(url)['ETag']
+        self.assertEqual(
+            self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            304,
+        )
+        rebuild_stale()
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Кого почитать')
+
+    def test_command(self):
+        out = StringIO()
+        call_command('build_suggestions', '--all', stdout=out)
+        self.assertIn(
+            f'Пользователей: {len(SuggestionsTest.users)}', out.getvalue()
+        )
@@ -0,0 +1,95 @@
+import re
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import FeedEntry, Follow, Post
+from taskqueue.models import Task
+from taskqueue.queue import work
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class QueuedTasksTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', email='auth@example.com', password='pass'
+        )
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(QueuedTasksTest.user)
+
+    def test_new_image_queues_thumbnails(self):
+        """Пост с картинкой ставит в очередь генерацию превью."""
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        })
+        self.assertTrue(Task.objects.filter(
+            name='posts.tasks.generate_post_thumbnails'
+        ).exists())
+        work('test')
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertTrue(post.thumbnails_ready)
+
+    def test_follow_queues_backfill(self):
+        """Подписка ставит в очередь бэкфилл ленты."""
+        post = Post.objects.create(author=QueuedTasksTest.author, text='Пост')
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        follow = Follow.objects.get(user=QueuedTasksTest.user)
+        self.assertFalse(follow.in_feed)
+        work('test')
+        follow.refresh_from_db()
+        self.assertTrue(follow.in_feed)
+        self.assertTrue(FeedEntry.objects.filter(
+            user=QueuedTasksTest.user, post=post
+        ).exists())
+
+    def test_password_reset_mail_sent_by_worker(self):
+        """Письмо сброса пароля отправляет воркер, а не запрос."""
+        Client().post(
+            reverse('users:password_reset_form'),
+            {'email': 'auth@example.com'}
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        task = Task.objects.get(name='users.tasks.send_password_reset_email')
+        self.assertNotIn('token', task.args)
+        self.assertNotIn('uid', task.args)
+        work('test')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['auth@example.com'])
+        # Ссылка из письма, собранная воркером, действительно сбрасывает.
+        link = re.search(r'/auth/reset/\S+/\S+/', mail.outbox[0].body)
+        response = Client().get(link.group(0), follow=True)
+        self.assertIn('new_password1', response.content.decode())
@@ -0,0 +1,87 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ThumbnailPipelineTest.user)
+
+    def create_post(self, name='small.gif'):
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile(
+                name=name, content=SMALL_GIF, content_type='image/gif'
+            ),
+        })
+        return Post.objects.get(text='Пост с картинкой')
+
+    def get_detail(self, post):
+        return self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        ).content.decode()
+
+    def test_new_image_served_as_original(self):
+        """До генерации превью страница отдаёт оригинал картинки."""
+        post = self.create_post()
+        self.assertFalse(post.thumbnails_ready)
+        content = self.get_detail(post)
+        self.assertIn(post.image.url, content)
+        self.assertNotIn('/media/cache/', content)
+
+    def test_worker_generates_thumbnails(self):
+        post = self.create_post()
+        call_command('generate_thumbnails', workers=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+        self.assertIn('/media/cache/', self.get_detail(post))
+
+    def test_edit_with_new_image_requeues(self):
+        post = self.create_post()
+        call_command('generate_thumbnails', workers=1, stdout=StringIO())
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            {
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(
+                    name='other.gif', content=SMALL_GIF,
+                    content_type='image/gif'
+                ),
+            }
+        )
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnails_ready)
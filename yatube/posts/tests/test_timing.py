@@ -0,0 +1,63 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(SERVER_TIMING=True)
+class ServerTimingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        # Middleware подключаются при первом запросе клиента, уже с
+        # переопределёнными настройками.
+        self.guest_client = Client()
+
+    def get_logged(self, url):
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.guest_client.get(url)
+        return response, json.loads(logs.records[-1].getMessage()), queries
+
+    def test_header_and_log(self):
+        """Заголовок и журнал содержат SQL, шаблоны, кэш и имя view."""
+        response, data, queries = self.get_logged(reverse('posts:index'))
+        timing = response['Server-Timing']
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        self.assertIn('view;desc="posts:index"', timing)
+        self.assertEqual(data['view'], 'posts:index')
+        self.assertEqual(data['status'], 200)
+        self.assertEqual(data['sql_count'], len(queries))
+        self.assertGreater(data['template_ms'], 0)
+        self.assertGreater(data['cache_misses'], 0)
+
+    def test_cached_page_counts_hits(self):
+        """Страница из кэша: есть попадания, нет рендеринга."""
+        self.get_logged(reverse('posts:index'))
+        _, data, _ = self.get_logged(reverse('posts:index'))
+        self.assertGreater(data['cache_hits'], 0)
+        self.assertEqual(data['template_ms'], 0)
+
+    def test_unresolved_path(self):
+        response, data, _ = self.get_logged('/missing-page/')
+        self.assertEqual(data['status'], 404)
+        self.assertEqual(data['view'], '')
+        self.assertIn('Server-Timing', response)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_disabled(self):
+        response = Client().get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
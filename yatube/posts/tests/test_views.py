@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 
@@ -172,6 +175,7 @@ class PaginatorViewsTest(TestCase):
             )
 
     def setUp(self):
+        cache.clear()
         self.user = PaginatorViewsTest.user
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -208,6 +212,42 @@ class PaginatorViewsTest(TestCase):
         response = self.client.get(rvrs + '?page=2')
         self.assertEqual(len(response.context['page_obj']), 3)
 
+    def test_cursor_pages_walk_whole_feed(self):
+        """Курсорные ссылки старее/новее обходят ленту без пропусков."""
+        first = self.client.get(reverse('posts:index')).context['page_obj']
+        cursor = first.next_cursor
+        response = self.client.get(reverse('posts:index'), {'after': cursor})
+        second = response.context['page_obj']
+        self.assertEqual(len(second), 3)
+        self.assertFalse(second.has_next())
+        self.assertEqual(
+            [post.pk for post in first] + [post.pk for post in second],
+            list(Post.objects.order_by('-pub_date', '-pk')
+                 .values_list('pk', flat=True))
+        )
+        response = self.client.get(
+            reverse('posts:index'), {'before': second.previous_cursor}
+        )
+        newer = response.context['page_obj']
+        self.assertEqual([post.pk for post in newer],
+                         [post.pk for post in first])
+        self.assertFalse(newer.has_previous())
+
+    def test_cursor_page_without_count_query(self):
+        """Курсорная страница не выполняет COUNT(*)."""
+        first = self.client.get(reverse('posts:index')).context['page_obj']
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(
+                reverse('posts:index'), {'after': first.next_cursor}
+            )
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+
+    def test_invalid_cursor_returns_first_page(self):
+        response = self.client.get(reverse('posts:index'), {'after': 'xx'})
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
 
 class PostCreateViewsTest(TestCase):
     @classmethod
@@ -411,3 +451,64 @@ class FollowCreateTest(TestCase):
         response = self.authorized_client.get(rvrs2)
         self.assertRedirects(response, rvrs)
         self.assertEqual(user1.following.all().count(), follow_count)
+
+
+class QueryCountViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group
+        )
+        Follow.objects.create(
+            user=User.objects.create_user(username='reader'),
+            author=cls.user,
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(
+            User.objects.get(username='reader')
+        )
+
+    def count_queries(self, url):
+        # Считаем с пустым кэшем: закэшированная первая страница
+        # комментариев иначе прятала бы их запрос только в одном замере.
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_page(self):
+        """Число запросов страницы не зависит от числа постов."""
+        post = QueryCountViewsTest.post
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('posts:follow_index'),
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+        )
+        for url in urls:
+            # Первый запрос создаёт счётчики автора, его не учитываем.
+            self.authorized_client.get(url)
+        before = {url: self.count_queries(url) for url in urls}
+        for i in range(9):
+            author = User.objects.create_user(username=f'user{i}')
+            Post.objects.create(
+                author=QueryCountViewsTest.user,
+                text=f'Пост {i}',
+                group=QueryCountViewsTest.group
+            )
+            Comment.objects.create(post=post, author=author, text='Ок')
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), before[url])
@@ -0,0 +1,44 @@
+"""Заблаговременная генерация превью картинок постов.
+
+Пост с новой картинкой сохраняется с thumbnails_ready=False и тем самым
+попадает в очередь (частичный индекс post-thumbnails-pending). Задача
+posts.tasks.generate_post_thumbnails строит все варианты из
+POST_THUMBNAILS и отмечает пост готовым; команда generate_thumbnails
+дочищает пропущенное пулом потоков. До этого шаблоны показывают оригинал.
+"""
+import time
+
+from sorl.thumbnail import get_thumbnail
+
+from core import metrics
+from core.page_cache import bump_pages
+from posts import cards
+from posts.models import Post
+
+# Все размеры превью, которые используют шаблоны.
+POST_THUMBNAILS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+
+def pending_posts():
+    """Посты, для картинок которых ещё нет превью."""
+    return Post.objects.filter(thumbnails_ready=False).exclude(image='')
+
+
+def generate_thumbnails(post):
+    """Строит превью картинки поста и отмечает пост готовым."""
+    for geometry, options in POST_THUMBNAILS:
+        start = time.perf_counter()
+        get_thumbnail(post.image, geometry, **options)
+        metrics.observe('yatube_thumbnail_duration_seconds',
+                        time.perf_counter() - start, geometry=geometry)
+    # Картинку могли заменить, пока строились превью: тогда пост
+    # останется в очереди со своей новой картинкой.
+    updated = Post.objects.filter(pk=post.pk, image=post.image.name).update(
+        thumbnails_ready=True
+    )
+    if updated:
+        cards.bump_version('post', post.pk)
+        bump_pages()
+    return bool(updated)
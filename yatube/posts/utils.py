@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+
+from core.paginator import CursorPaginator
+
+FEED_ORDERING = ('-pub_date', '-pk')
+
+
+def get_page_obj(request, post_list):
+    """Возвращает страницу ленты постов.
+
+    По умолчанию лента листается курсором (?after=/?before=) без COUNT
+    и OFFSET; старые ссылки вида ?page=N обслуживает обычный Paginator.
+    """
+    page_number = request.GET.get('page')
+    if page_number is not None:
+        paginator = Paginator(post_list, settings.PER_PAGE)
+        return paginator.get_page(page_number)
+    paginator = CursorPaginator(post_list, settings.PER_PAGE, FEED_ORDERING)
+    return paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
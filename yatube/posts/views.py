@@ -1,18 +1,35 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
 from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.http import (Http404, HttpResponseBadRequest,
+                         StreamingHttpResponse)
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.conf import settings
 
+from core.budgets import budget
+from core.page_cache import cache_anonymous_page, conditional_page
+from posts.comments import get_comments_page, get_first_comments
+from posts.counters import get_user_stats
+from posts.export import (CONTENT_TYPES, FORMATS, export_records,
+                          render_records)
+from posts.feed import get_feed_page
+from posts.follows import forget_following, get_follow_list
 from posts.forms import PostForm, CommentForm
 from posts.models import Post, Group, User, Follow
+from posts.search import search_posts
+from posts.suggestions import get_suggestions
+from posts.tasks import backfill_feed, generate_post_thumbnails
+from posts.utils import get_page_obj
 
 
+@budget(queries=4, ms=100)
+@conditional_page
+@cache_anonymous_page
 def index(request):
     template = 'posts/index.html'
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, settings.PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.select_related('author', 'group')
+    page_obj = get_page_obj(request, post_list)
     title = 'Это главная страница проекта Yatube'
     context = {
         'title': title,
@@ -22,13 +39,14 @@ def index(request):
     return render(request, template, context)
 
 
+@budget(queries=4, ms=100)
+@conditional_page
+@cache_anonymous_page
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, settings.PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = group.posts.select_related('author')
+    page_obj = get_page_obj(request, post_list)
     title = group.title
     context = {
         'title': title,
@@ -39,22 +57,34 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@budget(queries=3, ms=150)
+def search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    post_list = search_posts(
+        query, Post.objects.select_related('author', 'group')
+    )
+    # Выдача упорядочена по релевантности, курсор по дате здесь не подходит.
+    paginator = Paginator(post_list, settings.PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'title': f'Поиск: {query}' if query else 'Поиск',
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, template, context)
+
+
+@budget(queries=7, ms=100)
+@conditional_page
+@cache_anonymous_page
 def profile(request, username):
     author = get_object_or_404(User, username=username)
     template = 'posts/profile.html'
-    post_list = author.posts.all()
-    count = post_list.count()
-    sub_count = author.following.all().count()
-    paginator = Paginator(post_list, settings.PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = author.posts.select_related('group')
+    stats = get_user_stats(author)
+    page_obj = get_page_obj(request, post_list)
     sub = True
-    following = False
-
-    if request.user.is_authenticated:
-        if author.following.filter(user=request.user):
-            following = True
-
     if author == request.user:
         sub = False
 
@@ -63,34 +93,131 @@ def profile(request, username):
     context = {
         'title': title,
         'page_obj': page_obj,
-        'count': count,
+        'count': stats.posts_count,
         'author': author,
-        'following': following,
         'sub': sub,
-        'sub_count': sub_count
+        'suggestions': get_suggestions(request.user),
+        'sub_count': stats.followers_count
     }
     return render(request, template, context)
 
 
+# Значения параметров-флагов выгрузки, которые включают опцию.
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def get_flag(request, name):
+    """Включён ли флаг name в GET: ?comments=0 его не включает."""
+    return request.GET.get(name, '').strip().lower() in TRUE_VALUES
+
+
+def export_response(request, posts, filename):
+    """Отдаёт посты потоком; формат и состав задаются параметрами GET."""
+    format = request.GET.get('format', 'ndjson')
+    if format not in FORMATS:
+        return HttpResponseBadRequest(f'Неизвестный формат {format}')
+    records = export_records(
+        posts,
+        comments=get_flag(request, 'comments'),
+        images=get_flag(request, 'images'),
+        image_url=lambda name: request.build_absolute_uri(
+            default_storage.url(name)
+        ),
+    )
+    response = StreamingHttpResponse(
+        render_records(records, format),
+        content_type=CONTENT_TYPES[format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{format}"'
+    )
+    return response
+
+
+# Бюджет покрывает только начало ответа: посты читаются уже при отдаче.
+@budget(queries=1, ms=100)
+def group_export(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return export_response(request, group.posts.all(), group.slug)
+
+
+@budget(queries=1, ms=100)
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    return export_response(request, author.posts.all(), author.username)
+
+
+FOLLOW_LIST_TITLES = {
+    'followers': 'Подписчики {}',
+    'following': 'Подписки {}',
+}
+
+
+def follow_list_response(request, username, kind):
+    author = get_object_or_404(User, username=username)
+    people, next_cursor = get_follow_list(
+        kind, author.pk, after=request.GET.get('after')
+    )
+    context = {
+        'title': FOLLOW_LIST_TITLES[kind].format(username),
+        'author': author,
+        'people': people,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/follow_list.html', context)
+
+
+@budget(queries=4, ms=100)
+def followers(request, username):
+    return follow_list_response(request, username, 'followers')
+
+
+@budget(queries=4, ms=100)
+def following(request, username):
+    return follow_list_response(request, username, 'following')
+
+
+@budget(queries=6, ms=100)
+@conditional_page
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
-    count = post.author.posts.all().count()
-    sub_count = post.author.following.all().count()
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
+    stats = get_user_stats(post.author)
     form = CommentForm(request.POST or None)
-    comments_list = post.comments.all()
+    comments, next_cursor = get_first_comments(post.pk)
     title = str(post)
     context = {
         'title': title,
         'post': post,
-        'count': count,
+        'count': stats.posts_count,
         'form': form,
-        'comments': comments_list,
-        'sub_count': sub_count
+        'comments': comments,
+        'next_cursor': next_cursor,
+        'sub_count': stats.followers_count
     }
     return render(request, template, context)
 
 
+@budget(queries=3, ms=100)
+def post_comments(request, post_id):
+    """Фрагмент со следующей страницей комментариев поста."""
+    template = 'posts/includes/comments.html'
+    page_obj = get_comments_page(post_id, after=request.GET.get('after'))
+    if not page_obj.object_list and not Post.objects.filter(
+        pk=post_id
+    ).exists():
+        raise Http404
+    context = {
+        'post_id': post_id,
+        'comments': page_obj,
+        'next_cursor': page_obj.next_cursor,
+    }
+    return render(request, template, context)
+
+
+@budget(queries=8, ms=200)
 @login_required
 def post_create(request):
     template = 'posts/create_post.html'
@@ -108,9 +235,12 @@ def post_create(request):
     form = form.save(commit=False)
     form.author = request.user
     form.save()
+    if form.image:
+        generate_post_thumbnails.delay(form.pk)
     return redirect('posts:profile', username=request.user)
 
 
+@budget(queries=6, ms=200)
 @login_required
 def post_edit(request, post_id):
     posts = get_object_or_404(Post, pk=post_id)
@@ -135,10 +265,20 @@ def post_edit(request, post_id):
         return render(request, template, context)
     if not form.is_valid():
         return render(request, template, {'form': form})
-    form.save()
+    post = form.save(commit=False)
+    # Пишем только поля формы: comments_count и thumbnails_ready могли
+    # измениться через F() и воркер превью, пока открыта форма.
+    fields = list(form.fields)
+    if 'image' in form.changed_data:
+        post.thumbnails_ready = False
+        fields.append('thumbnails_ready')
+    post.save(update_fields=fields)
+    if 'image' in form.changed_data and post.image:
+        generate_post_thumbnails.delay(post.pk)
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@budget(queries=6, ms=200)
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -151,43 +291,55 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@budget(queries=6, ms=100)
 @login_required
 def follow_index(request):
     template = 'posts/follow.html'
-    post_list = Post.objects.filter(author__following__user=request.user).all()
-
-    paginator = Paginator(post_list, settings.PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_feed_page(request, request.user)
     title = 'Это главная страница проекта Yatube'
     context = {
         'title': title,
         'page_obj': page_obj,
+        'suggestions': get_suggestions(request.user),
     }
 
     return render(request, template, context)
 
 
+@budget(queries=10, ms=200)
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user == author:
         return redirect('posts:profile', username=username)
 
-    Follow.objects.get_or_create(user=request.user, author=author)
+    # Без проверки по кэшу подписок: он может отставать. Повторную
+    # подписку отсечёт уникальное ограничение (user, author) модели
+    # Follow.
+    try:
+        with transaction.atomic():
+            follow = Follow.objects.create(user=request.user, author=author)
+    except IntegrityError:
+        return redirect('posts:profile', username=username)
+    backfill_feed.delay(follow.pk)
     return redirect('posts:profile', username=username)
 
 
+@budget(queries=10, ms=200)
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    follower = author.following.filter(user=request.user)
-    if follower.exists():
-        follower.delete()
+    # Без проверки по кэшу подписок: он может отставать, а DELETE -
+    # один запрос в любом случае. Кэш сбрасывается и тогда, когда
+    # удалять было нечего: сигнал не сработает, а кэш мог считать
+    # подписку существующей.
+    Follow.objects.filter(user=request.user, author=author).delete()
+    forget_following(request.user.pk)
 
     return redirect('posts:profile', username=username)
 
 
+@budget(queries=8, ms=200)
 @login_required
 def delete_post(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
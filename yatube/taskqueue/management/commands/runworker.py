@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from taskqueue.queue import requeue_stale, work
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи из очереди taskqueue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=1,
+            help='Число потоков-воркеров в каждом процессе.'
+        )
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Число процессов-воркеров.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1,
+            help='Пауза, когда очередь пуста, секунды.'
+        )
+
+    def run(self, name, once, interval):
+        while True:
+            done = work(name)
+            if once:
+                return
+            if not done:
+                requeue_stale()
+                time.sleep(interval)
+
+    def run_in_thread(self, name, once, interval):
+        try:
+            self.run(name, once, interval)
+        finally:
+            connection.close()
+
+    def run_process(self, number, threads, once, interval):
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+        if threads == 1:
+            return self.run(prefix, once, interval)
+        workers = [
+            threading.Thread(
+                target=self.run_in_thread,
+                args=(f'{prefix}:{i}', once, interval),
+                daemon=True,
+            )
+            for i in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def handle(self, *args, **options):
+        requeue_stale()
+        params = (options['threads'], options['once'], options['interval'])
+        if options['processes'] == 1:
+            self.run_process(0, *params)
+            return
+        # Дочерние процессы не должны делить сокет соединения с родителем.
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=self.run_process, args=(number, *params)
+            )
+            for number in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
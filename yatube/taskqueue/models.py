@@ -0,0 +1,65 @@
+from django.db import models
+from django.utils import timezone
+
+from core.models import CreatedModel
+
+
+class Task(CreatedModel):
+    """Отложенный вызов функции, который выполнит runworker."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(
+        max_length=200,
+        help_text='Путь к функции, например posts.tasks.backfill_feed',
+        verbose_name='Функция'
+    )
+    args = models.TextField(default='[]', verbose_name='Аргументы (JSON)')
+    kwargs = models.TextField(
+        default='{}',
+        verbose_name='Именованные аргументы (JSON)'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Максимум попыток'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Выполнить не раньше'
+    )
+    locked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Взята в работу'
+    )
+    worker = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Воркер'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+
+    class Meta:
+        ordering = ('run_at', 'pk')
+        indexes = (
+            models.Index(fields=('status', 'run_at'),
+                         name='task-status-run-at'),
+        )
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
@@ -0,0 +1,118 @@
+"""Очередь фоновых задач в базе данных.
+
+enqueue() записывает задачу строкой Task в той же транзакции, что и
+запрос, поэтому задача не потеряется и не выполнится раньше коммита.
+Воркер (manage.py runworker) забирает задачи условным UPDATE: строку
+получает только тот воркер, чей UPDATE изменил статус queued -> running.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+
+def _task_name(func):
+    return func if isinstance(func, str) else (
+        f'{func.__module__}.{func.__name__}'
+    )
+
+
+def enqueue(func, *args, **kwargs):
+    """Ставит вызов func(*args, **kwargs) в очередь.
+
+    Аргументы должны сериализоваться в JSON. При TASKS_ALWAYS_EAGER
+    функция выполняется сразу, без записи в базу.
+    """
+    name = _task_name(func)
+    if settings.TASKS_ALWAYS_EAGER:
+        import_string(name)(*args, **kwargs)
+        return None
+    return Task.objects.create(
+        name=name,
+        args=json.dumps(args),
+        kwargs=json.dumps(kwargs),
+        max_attempts=settings.TASKS_MAX_ATTEMPTS,
+    )
+
+
+def task(func):
+    """Декоратор: добавляет функции метод delay() для постановки в очередь."""
+    def delay(*args, **kwargs):
+        return enqueue(func, *args, **kwargs)
+    func.delay = delay
+    return func
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи, брошенные упавшими воркерами."""
+    stale = timezone.now() - timedelta(seconds=settings.TASKS_STALE_TIMEOUT)
+    return Task.objects.filter(
+        status=Task.RUNNING, locked_at__lt=stale
+    ).update(status=Task.QUEUED, locked_at=None, worker='')
+
+
+def claim(worker):
+    """Забирает одну готовую задачу или возвращает None."""
+    ready = Task.objects.filter(
+        status=Task.QUEUED, run_at__lte=timezone.now()
+    ).values_list('pk', flat=True)
+    for pk in ready[:10]:
+        claimed = Task.objects.filter(pk=pk, status=Task.QUEUED).update(
+            status=Task.RUNNING,
+            worker=worker,
+            locked_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def execute(job):
+    """Выполняет задачу: удаляет её при успехе, иначе планирует повтор."""
+    try:
+        func = import_string(job.name)
+        func(*json.loads(job.args), **json.loads(job.kwargs))
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Задача %s #%s упала', job.name, job.pk)
+        if job.attempts >= job.max_attempts:
+            Task.objects.filter(pk=job.pk).update(
+                status=Task.FAILED, last_error=error, locked_at=None
+            )
+        else:
+            delay = settings.TASKS_RETRY_DELAY * 2 ** (job.attempts - 1)
+            Task.objects.filter(pk=job.pk).update(
+                status=Task.QUEUED,
+                run_at=timezone.now() + timedelta(seconds=delay),
+                last_error=error,
+                locked_at=None,
+                worker='',
+            )
+        return False
+    Task.objects.filter(pk=job.pk).delete()
+    return True
+
+
+def work(worker, limit=None):
+    """Выполняет готовые задачи, пока они есть.
+
+    Возвращает число взятых задач; limit ограничивает их количество.
+    """
+    done = 0
+    while limit is None or done < limit:
+        job = claim(worker)
+        if job is None:
+            break
+        execute(job)
+        done += 1
+    return done
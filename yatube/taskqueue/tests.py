@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from taskqueue.models import Task
+from taskqueue.queue import claim, enqueue, execute, requeue_stale, task, work
+
+CALLS = []
+
+
+@task
+def record(value, suffix=''):
+    CALLS.append(f'{value}{suffix}')
+
+
+@task
+def explode():
+    raise ValueError('Ошибка задачи')
+
+
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueue_stores_task(self):
+        """enqueue записывает задачу в базу и не выполняет её."""
+        job = record.delay('пост', suffix='!')
+        self.assertEqual(CALLS, [])
+        self.assertEqual(job.name, 'taskqueue.tests.record')
+        self.assertEqual(job.status, Task.QUEUED)
+
+    def test_worker_runs_and_deletes_task(self):
+        """Воркер выполняет задачу и удаляет её из очереди."""
+        record.delay('пост', suffix='!')
+        self.assertEqual(work('test'), 1)
+        self.assertEqual(CALLS, ['пост!'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_claimed_task_not_claimed_again(self):
+        """Взятую задачу второй воркер не получит."""
+        record.delay('пост')
+        self.assertIsNotNone(claim('first'))
+        self.assertIsNone(claim('second'))
+
+    def test_delayed_task_waits(self):
+        """Задача с run_at в будущем ещё не выполняется."""
+        job = record.delay('пост')
+        Task.objects.filter(pk=job.pk).update(
+            run_at=timezone.now() + timedelta(minutes=1)
+        )
+        self.assertEqual(work('test'), 0)
+
+    @override_settings(TASKS_RETRY_DELAY=10)
+    def test_failed_task_retried_then_failed(self):
+        """Упавшая задача повторяется с паузой, затем помечается failed."""
+        job = enqueue(explode)
+        Task.objects.filter(pk=job.pk).update(max_attempts=2)
+        with self.assertLogs('taskqueue.queue', 'ERROR'):
+            execute(claim('test'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('Ошибка задачи', job.last_error)
+
+        Task.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('taskqueue.queue', 'ERROR'):
+            execute(claim('test'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    @override_settings(TASKS_STALE_TIMEOUT=60)
+    def test_stale_task_requeued(self):
+        """Задача брошенного воркера возвращается в очередь."""
+        job = record.delay('пост')
+        claim('dead')
+        Task.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(minutes=5)
+        )
+        self.assertEqual(requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.QUEUED)
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager_mode_runs_inline(self):
+        """В режиме TASKS_ALWAYS_EAGER задача выполняется сразу."""
+        self.assertIsNone(record.delay('пост'))
+        self.assertEqual(CALLS, ['пост'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_runworker_once(self):
+        """runworker --once выполняет готовые задачи и завершается."""
+        record.delay('первый')
+        record.delay('второй')
+        call_command('runworker', once=True)
+        self.assertEqual(CALLS, ['первый', 'второй'])
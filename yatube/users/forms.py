@@ -1,6 +1,8 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth import get_user_model
 
+from users.tasks import send_password_reset_email
+
 User = get_user_model()
 
 
@@ -9,3 +11,22 @@ class CreationForm(UserCreationForm):
         model = User
 
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Сброс пароля, который отправляет письмо через очередь задач."""
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        # Строка задачи хранится и после ошибок, поэтому uid и токен в
+        # неё не пишем: воркер соберёт их сам по pk пользователя.
+        user = context['user']
+        context = {
+            key: value for key, value in context.items()
+            if key not in ('user', 'uid', 'token')
+        }
+        send_password_reset_email.delay(
+            user.pk, subject_template_name, email_template_name, context,
+            from_email, to_email, html_email_template_name
+        )
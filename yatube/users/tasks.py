@@ -0,0 +1,32 @@
+"""Фоновые задачи users, которые выполняет manage.py runworker."""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.forms import PasswordResetForm
+from django.contrib.auth.tokens import default_token_generator
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from taskqueue.queue import task
+
+
+@task
+def send_password_reset_email(user_id, subject_template_name,
+                              email_template_name, context, from_email,
+                              to_email, html_email_template_name=None):
+    """Отправляет письмо сброса пароля, поставленное QueuedPasswordResetForm.
+
+    Ссылку сброса (uid и токен) собирает воркер: в очереди лежат только
+    адрес и pk пользователя.
+    """
+    user = get_user_model().objects.filter(pk=user_id).first()
+    if user is None:
+        return
+    context = dict(
+        context,
+        user=user,
+        uid=urlsafe_base64_encode(force_bytes(user.pk)),
+        token=default_token_generator.make_token(user),
+    )
+    PasswordResetForm().send_mail(
+        subject_template_name, email_template_name, context, from_email,
+        to_email, html_email_template_name
+    )
@@ -3,6 +3,7 @@ from django.contrib.auth.views import LogoutView, PasswordChangeView, \
     PasswordResetDoneView, PasswordResetConfirmView, PasswordResetCompleteView
 from django.urls import path, reverse_lazy
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
@@ -19,6 +20,7 @@ urlpatterns = [
          ),
     path('password_reset/', PasswordResetView.as_view(
         template_name='users/password_reset_form.html',
+        form_class=QueuedPasswordResetForm,
         success_url=reverse_lazy('users:password_reset_done')
     ),
         name='password_reset_form'
@@ -51,10 +51,15 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'taskqueue.apps.TaskqueueConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.timing.ServerTimingMiddleware',
+    'core.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,6 +83,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.following.following',
             ],
         },
     },
@@ -94,6 +100,21 @@ DATABASES = {
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
+# Реплики только для чтения (core.replicas): пути к базам через запятую.
+# Локально реплику заменяет копия файла: cp db.sqlite3 replica.sqlite3
+# и DB_REPLICAS=replica.sqlite3 python manage.py runserver
+for number, name in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = tuple(alias for alias in DATABASES if alias != 'default')
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+# Сколько секунд после записи пользователь читает из основной базы
+REPLICA_PIN_SECONDS = 10
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -141,3 +162,59 @@ LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 PER_PAGE = 10
+# Лента подписок: авторы с большим числом подписчиков читаются напрямую
+FEED_FANOUT_LIMIT = 5000
+FEED_BATCH_SIZE = 1000
+# Размер пачки постов при потоковой выгрузке (posts.export)
+EXPORT_CHUNK_SIZE = 1000
+# Множитель временных бюджетов view (core.budgets) для медленных машин
+VIEW_BUDGET_TIME_FACTOR = float(os.getenv('VIEW_BUDGET_TIME_FACTOR', 1))
+# Заголовок Server-Timing и журнал замеров запросов (core.timing)
+SERVER_TIMING = os.getenv('SERVER_TIMING', '0') == '1'
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.timing': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+# Метрики Prometheus (core.metrics): файлы процессов складываются
+# страницей /metrics. Её отдают только с заголовком
+# Authorization: Bearer METRICS_TOKEN и с адресов METRICS_ALLOWED_IPS;
+# за локальным прокси все запросы идут с 127.0.0.1, поэтому без токена
+# страница закрыта.
+METRICS = os.getenv('METRICS', '0') == '1'
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(BASE_DIR, 'metrics'))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+# Как часто процесс сбрасывает свои метрики в файл, секунды
+METRICS_FLUSH_INTERVAL = 5
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+# Время жизни закэшированных подписок пользователя (posts.follows)
+FOLLOWING_CACHE_TIMEOUT = 60 * 60 * 24
+# Списки подписчиков и подписок: размер страницы и время жизни
+# закэшированной первой страницы, секунды
+FOLLOWS_PER_PAGE = 50
+FOLLOW_LISTS_CACHE_TIMEOUT = 60 * 15
+# «Кого почитать» (posts.suggestions): сколько авторов хранить на
+# пользователя, сколько показывать и время жизни кэша, секунды
+SUGGESTIONS_TOP_K = 20
+SUGGESTIONS_SHOWN = 5
+SUGGESTIONS_CACHE_TIMEOUT = 60 * 60
+# Время жизни отрендеренной карточки поста (posts.cards), секунды
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# Кэш страниц для анонимов (core.page_cache); свежесть держат версии
+PAGE_CACHE_TIMEOUT = 60 * 15
+# Комментарии к посту (posts.comments): размер страницы и время жизни
+# закэшированной первой страницы, секунды
+COMMENTS_PER_PAGE = 20
+POST_COMMENTS_CACHE_TIMEOUT = 60 * 15
+# Очередь задач (taskqueue): True - выполнять задачи сразу, без воркера
+TASKS_ALWAYS_EAGER = False
+TASKS_MAX_ATTEMPTS = 5
+# Пауза перед повтором упавшей задачи, удваивается с каждой попыткой
+TASKS_RETRY_DELAY = 10
+# Задача в статусе running дольше этого (секунды) считается брошенной
+TASKS_STALE_TIMEOUT = 60 * 10